@@ -0,0 +1,142 @@
+"""
+AsyncEngine class, runs the searches of an engine on a worker thread so a GUI
+stays responsive while the computer thinks. The GUI starts a search, polls it
+from its event loop (root.after in tkinter, the frame loop in pygame) for the
+progress and the move, and can cancel the search or ask for the best move
+found so far.
+"""
+
+import threading
+from typing import List
+
+# states of a search
+IDLE = "idle"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+
+
+class AsyncEngine:
+    """
+    AsyncEngine class
+
+    Searches with Minimax use iterative deepening, so "move now" can return
+    the best move of the last completed depth. Engines without a stop() method,
+    like StoneGameSolver, run to the end and only get cancelled.
+    """
+
+    def __init__(self, engine):
+        """
+        Initializes the AsyncEngine class
+
+        Args:
+            engine (Minimax): the engine to run, only used by the worker thread while searching
+        """
+        self.engine = engine
+        self.thread = None
+        self.status = IDLE
+        self.move = None
+        self.stats = None
+        self.error = None
+        self.start_nodes = 0
+        self.search_id = 0
+        self.lock = threading.Lock()
+
+    def start(self, state: List[int], **options):
+        """
+        Starts searching a copy of the state on a worker thread.
+        The options are passed to Minimax.search, e.g. iterations or time_limit.
+        """
+        if self.running():
+            raise RuntimeError("A search is already running")
+        if self.thread is not None and self.thread.is_alive():
+            # a cancelled search that has not noticed the stop yet
+            self.thread.join()
+        with self.lock:
+            self.search_id += 1
+            self.status = RUNNING
+            self.move = None
+            self.stats = None
+            self.error = None
+        if hasattr(self.engine, "stop_requested"):
+            self.engine.stop_requested = False
+        self.start_nodes = self.engine.nodes
+        self.thread = threading.Thread(target=self.run, args=(self.search_id, state.copy(), options),
+                                       daemon=True)
+        self.thread.start()
+
+    def run(self, search_id: int, state: List[int], options: dict):
+        """
+        Runs the search on the worker thread
+        """
+        move = None
+        stats = None
+        error = None
+        try:
+            if hasattr(self.engine, "search"):
+                move, stats = self.engine.search(state, iterative=True, **options)
+            else:
+                move = self.engine.minimax_move(state, **options)
+        except Exception as e:  # reported to the GUI by poll()
+            error = e
+        with self.lock:
+            if search_id != self.search_id or self.status != RUNNING:
+                # the search was cancelled
+                return
+            self.move = move
+            self.stats = stats
+            self.error = error
+            self.status = DONE
+
+    def running(self) -> bool:
+        return self.status == RUNNING
+
+    def poll(self) -> str:
+        """
+        Returns the status of the search, IDLE, RUNNING, DONE or CANCELLED.
+        Raises the exception of the search if it failed.
+        """
+        if self.status == DONE and self.error is not None:
+            error = self.error
+            self.error = None
+            raise error
+        return self.status
+
+    def progress(self) -> dict:
+        """
+        Returns the nodes searched so far, the last completed depth and its best move
+        """
+        stats = getattr(self.engine, "stats", None)
+        return {
+            "nodes": self.engine.nodes - self.start_nodes,
+            "depth": stats.completed_depth if stats is not None else 0,
+            "best_move": stats.best_move if stats is not None else None,
+        }
+
+    def move_now(self):
+        """
+        Asks the search to stop and return the best move found so far
+        """
+        if self.running() and hasattr(self.engine, "stop"):
+            self.engine.stop()
+
+    def cancel(self):
+        """
+        Stops the search and throws its result away
+        """
+        with self.lock:
+            if self.status != RUNNING:
+                return
+            self.status = CANCELLED
+        if hasattr(self.engine, "stop"):
+            self.engine.stop()
+
+    def take_move(self) -> int:
+        """
+        Returns the move of a finished search and makes the engine idle again
+        """
+        with self.lock:
+            move = self.move
+            self.move = None
+            self.status = IDLE
+        return move
@@ -0,0 +1,131 @@
+"""
+BatchMinimax class, a breadth first minimax search that works on NumPy arrays.
+Instead of visiting one node at a time, the search expands a whole level of the
+tree at once in batches, scores every batch with GameLogic.batch_evaluate and
+then backs the values up level by level with reduceat. There is no pruning, so
+it computes the exact value of every root move, which suits analysis workloads
+that score a very large number of positions.
+
+It works for games whose states are lists of cells (1 for X, -1 for O, 0 for
+empty) where a move places the mark of the player to move on an empty cell,
+like TicTacToe and MNKGame.
+"""
+
+from typing import List
+import numpy as np
+
+MAX = 1
+MIN = -1
+
+
+class BatchMinimax:
+    """
+    BatchMinimax class
+    """
+
+    def __init__(self, game_logic, batch_size: int = 65536):
+        """
+        Initializes the BatchMinimax class
+
+        Args:
+            game_logic (GameLogic): the game to search
+            batch_size (int): number of states evaluated and expanded at once
+        """
+        self.game = game_logic
+        self.batch_size = batch_size
+        self.nodes = 0
+
+    def expand(self, states: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        Generates the children of every state, the children of a state are
+        contiguous and ordered by action.
+
+        Returns:
+            (children, parents, actions): the child states, the row of the parent
+            of each child and the action that leads to it
+        """
+        players = self.game.batch_to_move(states)
+        parents, actions = np.nonzero(states == 0)
+        children = states[parents]
+        children[np.arange(len(parents)), actions] = players[parents]
+        return children, parents, actions
+
+    def solve(self, state: List[int], depth: int = None) -> (float, int, dict):
+        """
+        Searches the tree below the state level by level.
+        Levels deeper than 'depth' are cut off and scored with GameLogic.evaluate.
+
+        Returns:
+            (value, best_move, move_values): the value of the state, the best move
+            and the value of every move
+        """
+        game = self.game
+        frontier = np.array([game.cells(state)], dtype=np.int8)
+        # for each level: the values of the states, which states were expanded,
+        # the rows where the children of each expanded state start, the actions
+        # that lead to the states and the players to move
+        levels = []
+        level_actions = np.zeros(1, dtype=np.int64)
+        level = 0
+        while len(frontier):
+            values = np.zeros(len(frontier), dtype=np.float64)
+            players = game.batch_to_move(frontier)
+            expanded = np.zeros(len(frontier), dtype=bool)
+            children = []
+            parents = []
+            actions = []
+            for start in range(0, len(frontier), self.batch_size):
+                batch = frontier[start:start + self.batch_size]
+                terminal, utility = game.batch_evaluate(batch)
+                values[start:start + len(batch)] = utility
+                open_rows = np.nonzero(~terminal)[0]
+                if depth is not None and level >= depth:
+                    for row in open_rows:
+                        values[start + row] = game.evaluate(batch[row].tolist())
+                    continue
+                expanded[start + open_rows] = True
+                batch_children, batch_parents, batch_actions = self.expand(batch[open_rows])
+                children.append(batch_children)
+                parents.append(start + open_rows[batch_parents])
+                actions.append(batch_actions)
+            self.nodes += len(frontier)
+            if children:
+                parents = np.concatenate(parents)
+                starts = np.searchsorted(parents, np.nonzero(expanded)[0])
+                frontier = np.concatenate(children)
+                next_actions = np.concatenate(actions)
+            else:
+                starts = np.zeros(0, dtype=np.int64)
+                frontier = np.zeros((0, frontier.shape[1]), dtype=np.int8)
+                next_actions = np.zeros(0, dtype=np.int64)
+            levels.append((values, expanded, starts, level_actions, players))
+            level_actions = next_actions
+            level += 1
+
+        # back the values up from the deepest level to the root
+        for i in range(len(levels) - 2, -1, -1):
+            values, expanded, starts, _, players = levels[i]
+            if len(starts) == 0:
+                continue
+            child_values = levels[i + 1][0]
+            maxima = np.maximum.reduceat(child_values, starts)
+            minima = np.minimum.reduceat(child_values, starts)
+            values[expanded] = np.where(players[expanded] == MAX, maxima, minima)
+
+        root_value = float(levels[0][0][0])
+        if len(levels) < 2 or not levels[0][1][0]:
+            return root_value, None, {}
+        move_values = {int(a): float(v) for a, v in zip(levels[1][3], levels[1][0])}
+        player = game.to_move(state)
+        best_move = None
+        for action, value in move_values.items():
+            if best_move is None or value * player > move_values[best_move] * player:
+                best_move = action
+        return root_value, best_move, move_values
+
+    def minimax_move(self, state: List[int], player: str = None, depth: int = 0, iterations: int = None) -> int:
+        """
+        Returns the best move for the computer
+        """
+        _, move, _ = self.solve(state, iterations)
+        return move
@@ -0,0 +1,245 @@
+"""
+Benchmark suite for the engines.
+Every benchmark asks an engine for a move on a fixed position a number of
+times, each time with a fresh engine so nothing is cached between runs, and
+reports the nodes searched per second, the percentiles of the time to move
+and the peak memory of one extra run under tracemalloc.
+
+Tic-tac-toe positions are searched by Minimax with tree recording on
+(FullRecorder) and off (NullRecorder). StoneGame piles of several sizes are
+solved by StoneGameSolver, which does not record a tree.
+
+With --negamax the suite instead counts the nodes Minimax visits with
+max_value / min_value and in negamax mode (principal variation search with
+aspiration windows) on the tic-tac-toe positions and on random 4x4 boards.
+
+Usage:
+    python benchmark.py                          print the results as JSON
+    python benchmark.py --save-baseline base.json  save the results as the baseline
+    python benchmark.py --baseline base.json     compare the results with the baseline
+    python benchmark.py --negamax                compare the nodes of the two search modes
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import List
+from game_tic_tac_toe import TicTacToe
+from game_mnk import MNKGame
+from game_stone_game import StoneGame, PileState
+from minimax import Minimax
+from stone_game_solver import StoneGameSolver
+from tree_recorder import FullRecorder, NullRecorder
+
+TIC_TAC_TOE_POSITIONS = {
+    "empty": [0, 0, 0,
+              0, 0, 0,
+              0, 0, 0],
+    "mid-game": [1, 0, 0,
+                 0, -1, 0,
+                 0, 0, 1],
+    "near-terminal": [1, -1, 1,
+                      0, -1, 0,
+                      0, 1, 0],
+}
+STONE_PILE_SIZES = (15, 1000, 100000)
+# random 4x4 boards of the negamax comparison, with 4 marks placed, searched 6 plies deep
+MNK_POSITIONS = 6
+MNK_DEPTH = 6
+PERCENTILES = (50, 90, 99)
+# a change is reported when a metric gets worse by more than this ratio
+TOLERANCE = 0.10
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Returns the p-th percentile of the values with the nearest rank method
+    """
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(make_engine, state, repeats: int) -> dict:
+    """
+    Asks fresh engines for a move on the state and returns the statistics
+    """
+    latencies = []
+    nodes = 0
+    for _ in range(repeats):
+        engine = make_engine()
+        start = perf_counter()
+        engine.minimax_move(state)
+        latencies.append(perf_counter() - start)
+        nodes += engine.nodes
+    # memory is measured on a separate run, tracemalloc slows everything down
+    engine = make_engine()
+    tracemalloc.start()
+    engine.minimax_move(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    result = {
+        "repeats": repeats,
+        "nodes": nodes // repeats,
+        "nodes_per_sec": nodes / total if total > 0 else math.inf,
+        "mean_ms": 1000 * total / repeats,
+        "peak_memory_bytes": peak,
+    }
+    for p in PERCENTILES:
+        result[f"p{p}_ms"] = 1000 * percentile(latencies, p)
+    return result
+
+
+def bench_tic_tac_toe(repeats: int) -> dict:
+    """
+    Runs the tic-tac-toe positions with tree recording on and off
+    """
+    results = {}
+    for name, state in TIC_TAC_TOE_POSITIONS.items():
+        for recorder, label in ((FullRecorder, "tree"), (NullRecorder, "no-tree")):
+            def make_engine(recorder=recorder):
+                return Minimax(TicTacToe(), recorder=recorder())
+            results[f"tic-tac-toe/{name}/{label}"] = measure(make_engine, list(state), repeats)
+    return results
+
+
+def bench_stone_game(repeats: int, seed: int = 0) -> dict:
+    """
+    Runs StoneGame piles of several sizes, the same piles on every run
+    """
+    results = {}
+    rng = random.Random(seed)
+    for size in STONE_PILE_SIZES:
+        state = PileState(rng.randint(0, 10) for _ in range(size))
+
+        def make_engine():
+            return StoneGameSolver(StoneGame())
+        results[f"stone-game/{size}/no-tree"] = measure(make_engine, state, repeats)
+    return results
+
+
+def count_nodes(game, state, iterations: int, **options) -> dict:
+    """
+    Searches the state with iterative deepening in both search modes and returns their nodes
+    """
+    result = {}
+    for label, negamax in (("minimax", False), ("negamax", True)):
+        engine = Minimax(game, recorder=NullRecorder(), negamax=negamax, **options)
+        move, stats = engine.search(state, iterations=iterations, iterative=True)
+        result[f"{label}_nodes"] = stats.nodes
+        result[f"{label}_move"] = move
+        result[f"{label}_pv"] = stats.principal_variation
+    result["saved"] = 1 - result["negamax_nodes"] / result["minimax_nodes"]
+    return result
+
+
+def compare_negamax(seed: int = 0) -> dict:
+    """
+    Counts the nodes of max_value / min_value and of negamax on the same positions
+    """
+    results = {}
+    for name, state in TIC_TAC_TOE_POSITIONS.items():
+        results[f"tic-tac-toe/{name}"] = count_nodes(TicTacToe(), list(state), 9)
+    game = MNKGame(4, 4, 4)
+    rng = random.Random(seed)
+    for i in range(MNK_POSITIONS):
+        state = game.state
+        for _ in range(4):
+            state = game.result(state, rng.choice(game.actions(state)))
+        results[f"mnk-4x4/{i}"] = count_nodes(game, state, MNK_DEPTH)
+    minimax_nodes = sum(r["minimax_nodes"] for r in results.values())
+    negamax_nodes = sum(r["negamax_nodes"] for r in results.values())
+    return {
+        "results": results,
+        "minimax_nodes": minimax_nodes,
+        "negamax_nodes": negamax_nodes,
+        "saved": 1 - negamax_nodes / minimax_nodes,
+    }
+
+
+def run(repeats: int = 5) -> dict:
+    """
+    Runs all benchmarks
+    """
+    results = {}
+    results.update(bench_tic_tac_toe(repeats))
+    results.update(bench_stone_game(repeats))
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = TOLERANCE) -> List[str]:
+    """
+    Compares the results with a baseline report.
+
+    Returns:
+        the lines describing the benchmarks that got worse by more than the tolerance
+    """
+    # metrics where a larger value is better, the others are better when smaller
+    higher_is_better = {"nodes_per_sec"}
+    metrics = ["nodes_per_sec", "mean_ms", "peak_memory_bytes"] + [f"p{p}_ms" for p in PERCENTILES]
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in metrics:
+            old = base.get(metric)
+            new = result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if metric in higher_is_better:
+                change = -change
+            result.setdefault("change", {})[metric] = change
+            if change > tolerance:
+                regressions.append(f"{name} {metric}: {old:.4g} -> {new:.4g} ({change:+.1%} worse)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the minimax engines")
+    parser.add_argument("--repeats", type=int, default=5, help="moves timed per benchmark")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="compare with the JSON report in this file")
+    parser.add_argument("--save-baseline", help="write the JSON report to this file as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="ratio a metric may get worse before it is reported")
+    parser.add_argument("--negamax", action="store_true",
+                        help="compare the nodes of max_value / min_value and negamax instead")
+    args = parser.parse_args()
+
+    if args.negamax:
+        print(json.dumps(compare_negamax(), indent=2))
+        return
+
+    report = run(args.repeats)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        report["regressions"] = regressions
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+    if regressions:
+        print("\n".join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+CompactGameTree class, an array backed store for large game trees.
+Nodes have integer ids and every attribute is kept in its own array
+(struct of arrays), so a node costs a few dozen bytes instead of a networkx
+dict of dicts with a string key. The tree is converted to networkx only
+when it has to be plotted.
+
+A tree can be saved to a columnar binary file and memory-mapped again as a
+MappedGameTree, which reads only the pages of the nodes a query touches, so
+trees larger than the memory can be browsed without loading them.
+
+File layout (native byte order), every section starts at a multiple of 8 bytes:
+    header:       magic b"CGTR", version (uint16), num_cells (uint16), cols (uint16),
+                  reserved (uint16), count (uint64), roots (uint64), edges (uint64)
+    states:       count * stride bytes, the cells packed with 2 bits each
+    level:        count int8
+    player:       count int8
+    value:        count float64, NaN if the value was never set
+    best_move:    count int16, -1 if the best move was never set
+    parent:       count int32, -1 for the roots
+    roots:        roots int32
+    child_offsets: count + 1 int32, the children of node n are
+                  child_index[child_offsets[n]:child_offsets[n + 1]]
+    child_index:  edges int32
+    state_index:  count int32, the node ids sorted by their packed state
+"""
+
+import math
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from typing import List
+import networkx as nx
+from game_tree import GameTree, MAX_LEVEL
+
+NO_MOVE = -1
+NO_PARENT = -1
+
+MAGIC = b"CGTR"
+VERSION = 1
+HEADER = struct.Struct("=4sHHHHQQQ")
+ALIGNMENT = 8
+
+# cells are packed with 2 bits each, 4 cells in a byte
+CELL_CODES = {0: 0, 1: 1, -1: 2}
+CODE_CELLS = (0, 1, -1, 0)
+
+
+class CompactGameTree:
+    """
+    CompactGameTree class
+
+    Nodes are added in the order the search visits them. The children of a
+    node are found through CSR offsets (child_offsets, child_index) that
+    are rebuilt from the parent array the first time they are needed after
+    nodes were added.
+    """
+
+    def __init__(self, num_cells: int = 9, cols: int = 3):
+        """
+        Initializes the CompactGameTree class
+
+        Args:
+            num_cells (int): number of cells of a state
+            cols (int): number of columns of the board, used to draw the node labels
+        """
+        self.num_cells = num_cells
+        self.cols = cols
+        self.stride = (num_cells + 3) // 4
+        self.states = bytearray()
+        self.level = array('b')
+        self.player = array('b')
+        self.value = array('d')
+        self.best_move = array('h')
+        self.parent = array('i')
+        self.roots = array('i')
+        self.child_offsets = None
+        self.child_index = None
+
+    def __len__(self):
+        return len(self.parent)
+
+    def pack(self, state: List[int]) -> bytes:
+        """
+        Packs a list of cells into 2 bits per cell
+        """
+        packed = bytearray(self.stride)
+        for i, cell in enumerate(state):
+            packed[i >> 2] |= CELL_CODES[cell] << ((i & 3) << 1)
+        return packed
+
+    def state(self, node: int) -> List[int]:
+        """
+        Returns the list of cells of a node
+        """
+        start = node * self.stride
+        packed = self.states[start:start + self.stride]
+        return [CODE_CELLS[packed[i >> 2] >> ((i & 3) << 1) & 3]
+                for i in range(self.num_cells)]
+
+    def add_node(self, state: List[int], level: int, player: int, parent: int = NO_PARENT) -> int:
+        """
+        Adds a node and returns its id
+        """
+        node = len(self.parent)
+        self.states += self.pack(state)
+        self.level.append(level)
+        self.player.append(player)
+        self.value.append(math.nan)
+        self.best_move.append(NO_MOVE)
+        self.parent.append(parent)
+        if parent == NO_PARENT:
+            self.roots.append(node)
+        self.child_offsets = None
+        return node
+
+    def update_node_value(self, node: int, value):
+        """
+        Updates the value of a node
+        """
+        self.value[node] = value
+
+    def update_node_best_move(self, node: int, move: int):
+        """
+        Updates the best move of a node
+        """
+        self.best_move[node] = NO_MOVE if move is None else move
+
+    def get_value(self, node: int):
+        """
+        Returns the value of a node, None if it was never set
+        """
+        value = self.value[node]
+        return None if math.isnan(value) else value
+
+    def get_best_move(self, node: int):
+        """
+        Returns the best move of a node, None if it was never set
+        """
+        move = self.best_move[node]
+        return None if move == NO_MOVE else move
+
+    def build_children(self):
+        """
+        Builds the CSR child lists from the parent array with a counting sort
+        """
+        count = len(self.parent)
+        offsets = array('i', bytes(4 * (count + 1)))
+        for p in self.parent:
+            if p != NO_PARENT:
+                offsets[p + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        index = array('i', bytes(4 * offsets[count]))
+        fill = array('i', offsets[:count])
+        for node, p in enumerate(self.parent):
+            if p != NO_PARENT:
+                index[fill[p]] = node
+                fill[p] += 1
+        self.child_offsets = offsets
+        self.child_index = index
+
+    def children(self, node: int) -> array:
+        """
+        Returns the ids of the children of a node
+        """
+        if self.child_offsets is None:
+            self.build_children()
+        return self.child_index[self.child_offsets[node]:self.child_offsets[node + 1]]
+
+    def subtree(self, node: int, max_level: int = None) -> List[int]:
+        """
+        Returns the ids of the nodes below a node in breadth first order, down
+        to max_level levels below it. A node reached through several parents,
+        as in a tree converted from a GameTree, is returned once.
+        """
+        nodes = [node]
+        seen = {node}
+        last_level = None if max_level is None else self.level[node] + max_level
+        i = 0
+        while i < len(nodes):
+            cur = nodes[i]
+            i += 1
+            if last_level is not None and self.level[cur] >= last_level:
+                continue
+            for child in self.children(cur):
+                if child not in seen:
+                    seen.add(child)
+                    nodes.append(child)
+        return nodes
+
+    def get_path(self, node: int) -> List[int]:
+        """
+        Returns the ids of the nodes from a node along the best moves, until a
+        node without a best move. The move to a child is the cell it changed.
+        """
+        path = [node]
+        move = self.get_best_move(node)
+        while move is not None:
+            state = self.state(path[-1])
+            for child in self.children(path[-1]):
+                child_state = self.state(child)
+                if child_state[move] != state[move]:
+                    path.append(child)
+                    break
+            else:
+                break
+            move = self.get_best_move(path[-1])
+        return path
+
+    def state_key(self, node: int) -> bytes:
+        """
+        Returns the packed state of a node, the sort key of the state index
+        """
+        start = node * self.stride
+        return bytes(self.states[start:start + self.stride])
+
+    def save(self, path: str):
+        """
+        Saves the tree to a columnar binary file, see the module docstring for the layout
+        """
+        if self.child_offsets is None:
+            self.build_children()
+        count = len(self.parent)
+        state_index = array('i', sorted(range(count), key=self.state_key))
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.num_cells, self.cols, 0,
+                                count, len(self.roots), len(self.child_index)))
+            for section in (self.states, self.level, self.player, self.value, self.best_move,
+                            self.parent, self.roots, self.child_offsets, self.child_index, state_index):
+                f.write(bytes(-f.tell() % ALIGNMENT))
+                f.write(section)
+
+    def memory_usage(self) -> int:
+        """
+        Returns the number of bytes used by the node arrays
+        """
+        arrays = [self.level, self.player, self.value, self.best_move, self.parent, self.roots]
+        if self.child_offsets is not None:
+            arrays += [self.child_offsets, self.child_index]
+        return len(self.states) + sum(a.itemsize * len(a) for a in arrays)
+
+    def to_networkx(self, root: int = None, max_level: int = MAX_LEVEL) -> nx.DiGraph:
+        """
+        Converts the tree, or the subtree of 'root', to a networkx graph with the
+        node attributes GameTree uses. Only max_level levels below every root are
+        converted, and only the edges between the converted nodes.
+        """
+        G = nx.DiGraph()
+        roots = self.roots if root is None else [root]
+        for r in roots:
+            nodes = self.subtree(r, max_level)
+            inside = set(nodes)
+            for node in nodes:
+                G.add_node(node, state=self.state(node), level=self.level[node],
+                           player=self.player[node], value=self.get_value(node),
+                           best_move=self.get_best_move(node))
+            for node in nodes:
+                for child in self.children(node):
+                    if child in inside:
+                        G.add_edge(node, child)
+        return G
+
+    def to_game_tree(self, root: int = None, max_level: int = MAX_LEVEL) -> GameTree:
+        """
+        Converts the tree to a GameTree for plotting
+        """
+        tree = GameTree(cols=self.cols)
+        tree.G = self.to_networkx(root, max_level)
+        return tree
+
+    def plot_mini_max_tree(self, label_type="state", shold_plot=True):
+        """
+        Plots the minimax tree up to MAX_LEVEL
+        """
+        self.to_game_tree().plot_mini_max_tree(label_type, shold_plot)
+
+    def print_game_tree_from_node(self, node: int):
+        """
+        Prints the game tree from a given node
+        """
+        self.to_game_tree(node).print_game_tree_from_node(node)
+
+
+class MappedGameTree(CompactGameTree):
+    """
+    MappedGameTree class, a CompactGameTree memory-mapped from a file written
+    by CompactGameTree.save. The node arrays are memoryviews of the file, so
+    queries only read the pages of the nodes they visit. The tree is read only.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes the MappedGameTree class
+
+        Args:
+            path (str): file written by CompactGameTree.save
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_cells, cols, _, count, roots, edges = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a saved game tree")
+        self.num_cells = num_cells
+        self.cols = cols
+        self.stride = (num_cells + 3) // 4
+        view = memoryview(self.map)
+        self.views = []
+        start = HEADER.size
+
+        def section(length: int, fmt: str):
+            nonlocal start
+            start += -start % ALIGNMENT
+            size = length * struct.calcsize(fmt)
+            part = view[start:start + size].cast(fmt)
+            start += size
+            self.views.append(part)
+            return part
+
+        self.states = section(count * self.stride, 'B')
+        self.level = section(count, 'b')
+        self.player = section(count, 'b')
+        self.value = section(count, 'd')
+        self.best_move = section(count, 'h')
+        self.parent = section(count, 'i')
+        self.roots = section(roots, 'i')
+        self.child_offsets = section(count + 1, 'i')
+        self.child_index = section(edges, 'i')
+        self.state_index = section(count, 'i')
+        view.release()
+
+    def add_node(self, state: List[int], level: int, player: int, parent: int = NO_PARENT) -> int:
+        raise TypeError("A MappedGameTree is read only")
+
+    def update_node_value(self, node: int, value):
+        raise TypeError("A MappedGameTree is read only")
+
+    def update_node_best_move(self, node: int, move: int):
+        raise TypeError("A MappedGameTree is read only")
+
+    def find(self, state: List[int]) -> List[int]:
+        """
+        Returns the ids of the nodes with the state, with a binary search of the state index
+        """
+        key = bytes(self.pack(state))
+        index = self.state_index
+        i = bisect_left(index, key, key=self.state_key)
+        nodes = []
+        while i < len(index) and self.state_key(index[i]) == key:
+            nodes.append(index[i])
+            i += 1
+        return nodes
+
+    def close(self):
+        """
+        Releases the memory map
+        """
+        if self.map is not None:
+            for part in self.views:
+                part.release()
+            self.views = []
+            self.map.close()
+            self.map = None
+
+
+def from_game_tree(tree: GameTree) -> CompactGameTree:
+    """
+    Converts a GameTree to a CompactGameTree, e.g. to save it. A GameTree merges
+    the nodes of equal states, so a node can have several parents: the parent
+    array keeps the first one and the child lists keep every edge.
+    """
+    G = tree.G
+    nodes = [node for node, data in G.nodes(data=True) if 'state' in data]
+    num_cells = len(G.nodes[nodes[0]]['state']) if nodes else 9
+    compact = CompactGameTree(num_cells, tree.cols)
+    ids = {}
+    # parents are added before their children, level by level
+    nodes.sort(key=lambda n: G.nodes[n]['level'])
+    for node in nodes:
+        data = G.nodes[node]
+        parents = [p for p in G.predecessors(node) if p in ids]
+        ids[node] = compact.add_node(data['state'], data['level'], data['player'],
+                                     ids[parents[0]] if parents else NO_PARENT)
+        if data.get('value') is not None:
+            compact.update_node_value(ids[node], data['value'])
+        if data.get('best_move') is not None:
+            compact.update_node_best_move(ids[node], data['best_move'])
+    offsets = array('i', [0])
+    index = array('i')
+    for node in nodes:
+        index.extend(sorted(ids[child] for child in G.successors(node) if child in ids))
+        offsets.append(len(index))
+    compact.child_offsets = offsets
+    compact.child_index = index
+    return compact
@@ -3,6 +3,7 @@ This file contains the classes for the game logic of the games StoneGame and Tic
 """
 
 from typing import List
+import numpy as np
 
 
 class GameLogic:
@@ -15,6 +16,9 @@ class GameLogic:
         self.rules = ""
         self.player_score = 0
         self.computer_score = 0
+        # board size of board games, used to print and draw the state
+        self.rows = 3
+        self.cols = 3
 
     def actions(self, state: List[int]) -> List[int]:
         """
@@ -28,6 +32,131 @@ class GameLogic:
         """
         pass
 
+    def to_move(self, state: List[int]) -> int:
+        """
+        Returns the player to move in the state, 1 for max and -1 for min.
+        By default the max player moves when an even number of marks was placed.
+        """
+        marks = 0
+        for cell in state:
+            if cell != 0:
+                marks += 1
+        return 1 if marks % 2 == 0 else -1
+
+    def make_move(self, state: List[int], action: int, player: int = None) -> int:
+        """
+        Places the mark of 'player' on the cell 'action' of a mutable state in
+        place, the player to move by default. Returns the player who moved, so
+        a search can pass the side to move down instead of counting marks.
+        Use result() to get a new state instead.
+        """
+        if player is None:
+            player = self.to_move(state)
+        state[action] = player
+        return player
+
+    def unmake_move(self, state: List[int], action: int):
+        """
+        Takes back the move 'action' made with make_move
+        """
+        state[action] = 0
+
+    def copy_state(self, state: List[int]) -> List[int]:
+        """
+        Returns a mutable copy of the state that make_move and unmake_move can change
+        """
+        return state.copy()
+
+    def batch_evaluate(self, states: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Determines the terminal flag and the utility of many states at once.
+        This default calls is_terminal and utility for every row, games with
+        cell states override it with a vectorized version.
+
+        Args:
+            states (np.ndarray): (N, cells) array, one state per row
+
+        Returns:
+            (terminal, utility): (N,) bool array and (N,) int array
+        """
+        terminal = np.zeros(len(states), dtype=bool)
+        utility = np.zeros(len(states), dtype=np.int8)
+        for i, row in enumerate(states):
+            state = row.tolist()
+            terminal[i] = self.is_terminal(state)
+            if terminal[i]:
+                utility[i] = self.utility(state)
+        return terminal, utility
+
+    def batch_to_move(self, states: np.ndarray) -> np.ndarray:
+        """
+        Returns the player to move in each row of an (N, cells) array of states
+        """
+        marks = np.count_nonzero(states, axis=1)
+        return np.where(marks % 2 == 0, 1, -1).astype(states.dtype)
+
+    def evaluate(self, state: List[int]) -> float:
+        """
+        Estimates the value of a non-terminal state when the search is cut off
+        before the end of the game. The estimate must stay strictly between the
+        utility of a loss and of a win.
+        """
+        return 0
+
+    def state_key(self, state: List[int]):
+        """
+        Returns a hashable key identifying the state, used for caching search results
+        """
+        return tuple(state)
+
+    def encode_state(self, state: List[int]) -> int:
+        """
+        Returns the state as an integer, reading the cells as base-3 digits
+        (0 for empty, 1 for X, 2 for O) with the first cell as the lowest digit.
+        Used as the key of the precomputed solution tables.
+        """
+        code = 0
+        for cell in reversed(self.cells(state)):
+            code = code * 3 + (2 if cell == -1 else cell)
+        return code
+
+    def cells(self, state: List[int]) -> List[int]:
+        """
+        Returns the state as a list of cells, the form the game tree and the GUIs use
+        """
+        return state
+
+    def cells_logic(self):
+        """
+        Returns the game logic that plays on the lists of cells returned by cells()
+        """
+        return self
+
+    def canonical(self, state: List[int]):
+        """
+        Returns the key of the state in canonical form and the index of the symmetry
+        that maps the state to it. Games without symmetries return the plain key.
+        """
+        return self.state_key(state), 0
+
+    def to_canonical_move(self, action: int, symmetry: int) -> int:
+        """
+        Maps an action on the real board to the same action on the canonical board
+        """
+        return action
+
+    def from_canonical_move(self, action: int, symmetry: int) -> int:
+        """
+        Maps an action on the canonical board back to the real board
+        """
+        return action
+
+    def unique_actions(self, state: List[int]) -> List[int]:
+        """
+        Returns the actions that lead to states which are not symmetric to each other
+        """
+        return self.actions(state)
+
     def reset(self):
         self.state = []
         self.player_score = 0
@@ -46,7 +175,7 @@ class GameLogic:
         ret = ""
         for i, s in enumerate(self.state):
             ret += str(s)
-            if i % 3 == 2:
+            if i % self.cols == self.cols - 1:
                 ret += "\n"
             else:
                 ret += " "
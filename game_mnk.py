@@ -0,0 +1,235 @@
+"""
+MNKGame class for the game logic of m,n,k-games.
+Two players take turns placing their mark on an m x n board, the first player
+with k marks in a row (horizontally, vertically or diagonally) wins.
+Tic-tac-toe is the 3,3,3-game, Gomoku is the 15,15,5-game.
+"""
+
+from typing import List
+import numpy as np
+from game import GameLogic
+
+
+class MNKState(list):
+    """
+    MNKState class, a list of cells that also remembers the winner and the
+    number of marks. Both are updated when a move is made, so the terminal test
+    does not have to scan the board.
+    """
+    __slots__ = ("winner", "marks")
+
+    def __init__(self, cells=(), winner: int = 0, marks: int = 0):
+        super().__init__(cells)
+        self.winner = winner
+        self.marks = marks
+
+    def copy(self):
+        return MNKState(self, self.winner, self.marks)
+
+
+def winning_lines(rows: int, cols: int, k: int) -> List[tuple]:
+    """
+    Returns the cell indices of every k long line on a rows x cols board
+    """
+    lines = []
+    for row in range(rows):
+        for col in range(cols):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + d_row * (k - 1)
+                end_col = col + d_col * (k - 1)
+                if 0 <= end_row < rows and 0 <= end_col < cols:
+                    lines.append(tuple((row + d_row * i) * cols + col + d_col * i
+                                       for i in range(k)))
+    return lines
+
+
+class MNKGame(GameLogic):
+    """
+    MNKGame class
+    """
+
+    def __init__(self, m: int = 4, n: int = 4, k: int = 4):
+        """
+        Initializes the MNKGame class
+
+        Args:
+            m (int): number of rows
+            n (int): number of columns
+            k (int): number of marks in a row needed to win
+        """
+        super().__init__()
+        if k > max(m, n):
+            raise ValueError(f"A {m}x{n} board has no {k} long lines")
+        self.rows = m
+        self.cols = n
+        self.k = k
+        self.size = m * n
+        self.rules = f"The game is played on a {m}x{n} grid. Players take turns placing their symbol (X or O) in an empty square. The player who gets {k} of their symbols in a row wins."
+        self.lines = winning_lines(m, n, k)
+        # the lines going through each cell, the only ones a move there can complete
+        self.cell_lines = [[] for _ in range(self.size)]
+        for line in self.lines:
+            for cell in line:
+                self.cell_lines[cell].append(line)
+        # line_matrix[i, j] is 1 if cell i is on the j-th line
+        self.line_matrix = np.zeros((self.size, len(self.lines)), dtype=np.int8)
+        for j, line in enumerate(self.lines):
+            self.line_matrix[list(line), j] = 1
+        self.state = MNKState([0] * self.size)
+
+    def wrap(self, state: List[int]) -> MNKState:
+        """
+        Returns the state as an MNKState, scanning the whole board if it is a plain list
+        """
+        if isinstance(state, MNKState):
+            return state
+        winner = 0
+        for line in self.lines:
+            first = state[line[0]]
+            if first != 0 and all(state[i] == first for i in line):
+                winner = first
+                break
+        return MNKState(state, winner, self.size - state.count(0))
+
+    def wins_through(self, state: List[int], cell: int, player: int) -> bool:
+        """
+        Returns whether 'player' has a complete line through 'cell'
+        """
+        for line in self.cell_lines[cell]:
+            for i in line:
+                if state[i] != player:
+                    break
+            else:
+                return True
+        return False
+
+    def actions(self, state: List[int]) -> List[int]:
+        """
+        Generates a list of possible actions based on the current state
+        """
+        if self.is_terminal(state):
+            return []
+        return [i for i in range(self.size) if state[i] == 0]
+
+    def result(self, state: List[int], action: int) -> MNKState:
+        """
+        Returns the resulting state given the action on the current state.
+        Only the lines through the action are checked for a win.
+        """
+        state = self.wrap(state)
+        player = 1 if state.marks % 2 == 0 else -1
+        new_state = MNKState(state, state.winner, state.marks + 1)
+        new_state[action] = player
+        if self.wins_through(new_state, action, player):
+            new_state.winner = player
+        return new_state
+
+    def make_move(self, state: List[int], action: int, player: int = None) -> int:
+        """
+        Places the mark of 'player' on the cell 'action' in place and updates the
+        winner and the number of marks of an MNKState
+        """
+        if player is None:
+            player = self.to_move(state)
+        state[action] = player
+        if isinstance(state, MNKState):
+            state.marks += 1
+            if self.wins_through(state, action, player):
+                state.winner = player
+        return player
+
+    def unmake_move(self, state: List[int], action: int):
+        """
+        Takes back the move 'action' made with make_move. Moves are never made
+        in a won state, so there was no winner before it.
+        """
+        state[action] = 0
+        if isinstance(state, MNKState):
+            state.marks -= 1
+            state.winner = 0
+
+    def is_terminal(self, state: List[int] = None, player: int = None) -> bool:
+        """
+        Determines if the game is in a terminal state
+        """
+        if state is None:
+            state = self.state
+        state = self.wrap(state)
+        return state.winner != 0 or state.marks == self.size
+
+    def utility(self, state: List[int], player: int = None) -> int:
+        """
+        Determines the utility of the current state
+        """
+        return self.wrap(state).winner
+
+    def batch_evaluate(self, states: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Determines the terminal flag and the utility of an (N, m*n) array of states
+        with one matrix product against the line matrix. A line sums to k when
+        X holds it and to -k when O holds it.
+        """
+        line_sums = states.astype(np.int16) @ self.line_matrix.astype(np.int16)
+        x_wins = (line_sums == self.k).any(axis=1)
+        o_wins = (line_sums == -self.k).any(axis=1)
+        utility = np.where(x_wins, 1, np.where(o_wins, -1, 0)).astype(np.int8)
+        terminal = x_wins | o_wins | (states != 0).all(axis=1)
+        return terminal, utility
+
+    def evaluate(self, state: List[int]) -> float:
+        """
+        Estimates the value of a non-terminal state by the number of lines
+        still open for X minus the number of lines still open for O
+        """
+        score = 0
+        for line in self.lines:
+            x_marks = False
+            o_marks = False
+            for i in line:
+                if state[i] == 1:
+                    x_marks = True
+                elif state[i] == -1:
+                    o_marks = True
+            if x_marks and not o_marks:
+                score += 1
+            elif o_marks and not x_marks:
+                score -= 1
+        return score / (len(self.lines) + 1)
+
+    def to_move(self, state: List[int]) -> int:
+        """
+        Returns the player to move in the state, 1 for X and -1 for O
+        """
+        return 1 if self.wrap(state).marks % 2 == 0 else -1
+
+    def reset(self):
+        """
+        Resets the game state
+        """
+        super().reset()
+        self.state = MNKState([0] * self.size)
+
+    def __type__(self):
+        return "MNKGame"
+
+    def print_state(self, state: List[int] = None) -> str:
+        """
+        return pretty print of the game state
+        """
+        if state is None:
+            state = self.state
+        symbols = {0: " ", 1: "X", -1: "O"}
+        ret = ""
+        for i, s in enumerate(state):
+            ret += symbols[s]
+            if i % self.cols == self.cols - 1:
+                ret += "\n"
+            else:
+                ret += " | "
+        return ret
+
+    def __str__(self):
+        """
+        return pretty print of the game state
+        """
+        return self.print_state(self.state)
@@ -8,11 +8,95 @@ Unlike simpler versions of the game, the winner is the player holding
 the most stones value at the end of the game.
 """
 
+from array import array
 from typing import List
 import random
 from game import GameLogic
 
 
+class PileState:
+    """
+    PileState class, the stones left in the game as an offset into the pile.
+    All states of a game share the same immutable stones and prefix sums, so
+    a move only adds to the offset and the score of a move is the difference
+    of two prefix sums. It reads like the list of the remaining stones
+    (len, indexing, iteration, printing), which is what the GUI renders.
+    """
+    __slots__ = ("stones", "prefix", "offset", "pile_hash")
+
+    def __init__(self, stones=(), offset: int = 0, prefix: array = None, pile_hash: int = None):
+        """
+        Args:
+            stones: the whole pile, copied into an array unless it is one already
+            offset (int): number of stones already taken from the front
+            prefix (array): prefix[i] is the sum of the first i stones, computed if not given
+        """
+        if not isinstance(stones, array):
+            stones = array('q', stones)
+        if prefix is None:
+            prefix = array('q', bytes(8 * (len(stones) + 1)))
+            total = 0
+            for i, stone in enumerate(stones):
+                total += stone
+                prefix[i + 1] = total
+        self.stones = stones
+        self.prefix = prefix
+        self.offset = offset
+        self.pile_hash = hash(stones.tobytes()) if pile_hash is None else pile_hash
+
+    def take(self, count: int) -> ("PileState", int):
+        """
+        Returns the state after taking 'count' stones from the front and their sum
+        """
+        offset = self.offset
+        score = self.prefix[offset + count] - self.prefix[offset]
+        return PileState(self.stones, offset + count, self.prefix, self.pile_hash), score
+
+    def sum(self, count: int = None) -> int:
+        """
+        Returns the sum of the first 'count' remaining stones, of all of them by default
+        """
+        end = len(self.stones) if count is None else min(self.offset + count, len(self.stones))
+        return self.prefix[end] - self.prefix[self.offset]
+
+    def copy(self) -> "PileState":
+        # the stones are never changed, so the state can be shared
+        return self
+
+    def __len__(self):
+        return len(self.stones) - self.offset
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            stones, offset = self.stones, self.offset
+            return [stones[offset + i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pile index out of range")
+        return self.stones[self.offset + index]
+
+    def __iter__(self):
+        stones = self.stones
+        for i in range(self.offset, len(stones)):
+            yield stones[i]
+
+    def __eq__(self, other):
+        if isinstance(other, PileState):
+            # states of different piles are different states, even with the same stones left
+            return other.offset == self.offset and (other.stones is self.stones
+                                                     or other.stones == self.stones)
+        if isinstance(other, list):
+            return len(other) == len(self) and other == list(self)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.pile_hash, self.offset))
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class StoneGame(GameLogic):
     """
     StoneGame class
@@ -21,8 +105,8 @@ class StoneGame(GameLogic):
     def __init__(self):
         super().__init__()
         self.rules = "The game starts with a pile of stones. Players take turns taking 1, 2, or 3 stones from the pile. The player who takes the last stone loses."
-        self.state = [random.randint(0, 10)
-                      for _ in range(random.randint(14, 17))]
+        self.state = PileState(random.randint(0, 10)
+                               for _ in range(random.randint(14, 17)))
 
     def actions(self, state: List[int]) -> List[int]:
         """
@@ -30,12 +114,26 @@ class StoneGame(GameLogic):
         """
         return [i for i in range(1, min(3, len(state)) + 1)]
 
-    def result(self, state: List[int], action: int) -> (List[int], int):
+    def wrap(self, state: List[int]) -> PileState:
+        """
+        Returns the state as a PileState, copying it if it is a plain list
+        """
+        if isinstance(state, PileState):
+            return state
+        return PileState(state)
+
+    def result(self, state: List[int], action: int) -> (PileState, int):
         """
         Returns the resulting state and the score gained by taking 'action' number of stones
         """
-        score = sum(state[:action])
-        return state[action:], score
+        return self.wrap(state).take(action)
+
+    def state_key(self, state: List[int]):
+        """
+        Returns a hashable key identifying the state, states of the same pile
+        are hashed by their offset without reading the stones
+        """
+        return self.wrap(state)
 
     def utility(self, state: List[int], player: int) -> int:
         """
@@ -49,7 +147,7 @@ class StoneGame(GameLogic):
         Resets the game state
         """
         super().reset()
-        self.state = [i for i in range(15)]
+        self.state = PileState(range(15))
 
     def check_winner(self, state: List[int]) -> str:
         """
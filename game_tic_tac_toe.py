@@ -3,6 +3,7 @@ TicTacToe class for the game logic of the TicTacToe game
 """
 
 from typing import List
+import numpy as np
 from game import GameLogic
 
 GOAL_STATES = [  # 8 possible winning combinations
@@ -16,6 +17,53 @@ GOAL_STATES = [  # 8 possible winning combinations
     [2, 4, 6],  # diagonal
 ]
 
+# LINE_MATRIX[i, j] is 1 if cell i is on the j-th winning line, so that
+# states @ LINE_MATRIX gives the sum of the marks on every line
+LINE_MATRIX = np.zeros((9, len(GOAL_STATES)), dtype=np.int8)
+for _line, _combo in enumerate(GOAL_STATES):
+    LINE_MATRIX[_combo, _line] = 1
+
+
+def _rotate(perm: List[int]) -> List[int]:
+    """
+    Rotates a permutation of the board cells by 90 degrees clockwise
+    """
+    return [perm[(2 - col) * 3 + row] for row in range(3) for col in range(3)]
+
+
+def _reflect(perm: List[int]) -> List[int]:
+    """
+    Reflects a permutation of the board cells around the vertical axis
+    """
+    return [perm[row * 3 + 2 - col] for row in range(3) for col in range(3)]
+
+
+# the 8 dihedral symmetries of the board, the transformed state is
+# [state[perm[i]] for i in range(9)]
+SYMMETRIES = [list(range(9))]
+for _ in range(3):
+    SYMMETRIES.append(_rotate(SYMMETRIES[-1]))
+SYMMETRIES += [_reflect(perm) for perm in SYMMETRIES]
+
+# INVERSE_SYMMETRIES[k][i] is the cell that cell i is moved to by SYMMETRIES[k]
+INVERSE_SYMMETRIES = [[perm.index(i) for i in range(9)] for perm in SYMMETRIES]
+
+
+def canonical_form(state: List[int]) -> (tuple, int):
+    """
+    Returns the smallest of the 8 symmetric forms of the state
+    and the index of the symmetry that produces it
+    """
+    best = None
+    best_symmetry = 0
+    for k, perm in enumerate(SYMMETRIES):
+        transformed = tuple([state[i] for i in perm])
+        if best is None or transformed < best:
+            best = transformed
+            best_symmetry = k
+    return best, best_symmetry
+
+
 MAX_PLAYER = "X"
 MIN_PLAYER = "O"
 
@@ -52,6 +100,33 @@ class TicTacToe(GameLogic):
                     return player
         return 0
 
+    def evaluate(self, state: List[int]) -> float:
+        """
+        Estimates the value of a non-terminal state by the number of lines
+        still open for X minus the number of lines still open for O
+        """
+        score = 0
+        for combo in GOAL_STATES:
+            marks = [state[i] for i in combo]
+            if -1 not in marks and 1 in marks:
+                score += 1
+            elif 1 not in marks and -1 in marks:
+                score -= 1
+        return score / 10
+
+    def batch_evaluate(self, states: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Determines the terminal flag and the utility of an (N, 9) array of states
+        with one matrix product against the line matrix. A line sums to 3 when
+        X holds it and to -3 when O holds it.
+        """
+        line_sums = states.astype(np.int8) @ LINE_MATRIX
+        x_wins = (line_sums == 3).any(axis=1)
+        o_wins = (line_sums == -3).any(axis=1)
+        utility = np.where(o_wins, -1, np.where(x_wins, 1, 0)).astype(np.int8)
+        terminal = x_wins | o_wins | (states != 0).all(axis=1)
+        return terminal, utility
+
     def result(self, state: List[int], action: int) -> (List[int], int):
         """
         Returns the resulting state given the action on the current state
@@ -92,6 +167,37 @@ class TicTacToe(GameLogic):
                     return True
         return False
 
+    def canonical(self, state: List[int]) -> (tuple, int):
+        """
+        Returns the smallest symmetric form of the state and the symmetry that produces it
+        """
+        return canonical_form(state)
+
+    def to_canonical_move(self, action: int, symmetry: int) -> int:
+        """
+        Maps an action on the real board to the same action on the canonical board
+        """
+        return INVERSE_SYMMETRIES[symmetry][action]
+
+    def from_canonical_move(self, action: int, symmetry: int) -> int:
+        """
+        Maps an action on the canonical board back to the real board
+        """
+        return SYMMETRIES[symmetry][action]
+
+    def unique_actions(self, state: List[int]) -> List[int]:
+        """
+        Returns one action of every group of actions that lead to symmetric states.
+        Two actions are equivalent if a symmetry that keeps the state unchanged
+        maps one to the other, the action with the smallest index is kept.
+        """
+        actions = self.actions(state)
+        stabilizer = [perm for perm in SYMMETRIES[1:]
+                      if all(state[perm[i]] == state[i] for i in range(9))]
+        if not stabilizer:
+            return actions
+        return [a for a in actions if all(perm[a] >= a for perm in stabilizer)]
+
     def __type__(self):
         return "TicTacToe"
 
@@ -105,7 +211,7 @@ class TicTacToe(GameLogic):
         ret = ""
         for i, s in enumerate(state):
             ret += symbols[s]
-            if i % 3 == 2:
+            if i % self.cols == self.cols - 1:
                 ret += "\n"
             else:
                 ret += " | "
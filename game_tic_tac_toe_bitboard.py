@@ -0,0 +1,231 @@
+"""
+BitboardTicTacToe class for a faster TicTacToe game logic.
+The board is stored as two 9-bit integers, one for the X marks and one for the O marks.
+Bit i is set when cell i (row major, same order as the list state) holds the mark.
+"""
+
+from typing import List, Tuple
+from game_tic_tac_toe import TicTacToe, GOAL_STATES, SYMMETRIES
+
+FULL_BOARD = (1 << 9) - 1
+
+# one 9-bit mask for each winning line
+WIN_MASKS = [sum(1 << i for i in combo) for combo in GOAL_STATES]
+
+# for every possible set of marks of one player, whether it contains a winning line
+WIN_TABLE = [any(bits & mask == mask for mask in WIN_MASKS)
+             for bits in range(1 << 9)]
+
+# for every possible occupancy of the board, the empty cells in index order
+EMPTY_CELLS = [tuple(i for i in range(9) if not occupied >> i & 1)
+               for occupied in range(1 << 9)]
+
+POPCOUNT = [bin(bits).count("1") for bits in range(1 << 9)]
+
+# SYMMETRY_BITS[k][bits] is the set of marks moved by the k-th board symmetry
+SYMMETRY_BITS = [[sum(1 << i for i in range(9) if bits >> perm[i] & 1)
+                  for bits in range(1 << 9)]
+                 for perm in SYMMETRIES]
+
+Bitboard = Tuple[int, int]
+
+
+class BitboardTicTacToe(TicTacToe):
+    """
+    BitboardTicTacToe class
+
+    A state is a tuple (x_bits, o_bits). It is hashable and immutable, so
+    it can be used as is in the transposition table and the game tree.
+    The in-place search works on a list [x_bits, o_bits] instead, see copy_state.
+    """
+
+    def __init__(self):
+        """
+        Initializes the BitboardTicTacToe class
+        """
+        super().__init__()
+        self.state = (0, 0)
+
+    def actions(self, state: Bitboard) -> List[int]:
+        """
+        Generates a list of possible actions based on the current state
+        """
+        x_bits, o_bits = state
+        if WIN_TABLE[x_bits] or WIN_TABLE[o_bits]:
+            return []
+        return list(EMPTY_CELLS[x_bits | o_bits])
+
+    def utility(self, state: Bitboard, player: int = None) -> int:
+        """
+        Determines the utility of the current state
+        """
+        x_bits, o_bits = state
+        if WIN_TABLE[o_bits]:
+            return -1
+        if WIN_TABLE[x_bits]:
+            return 1
+        return 0
+
+    def evaluate(self, state: Bitboard) -> float:
+        """
+        Estimates the value of a non-terminal state by the number of lines
+        still open for X minus the number of lines still open for O
+        """
+        x_bits, o_bits = state
+        score = 0
+        for mask in WIN_MASKS:
+            if mask & o_bits == 0 and mask & x_bits:
+                score += 1
+            elif mask & x_bits == 0 and mask & o_bits:
+                score -= 1
+        return score / 10
+
+    def result(self, state: Bitboard, action: int) -> Bitboard:
+        """
+        Returns the resulting state given the action on the current state
+        """
+        x_bits, o_bits = state
+        if POPCOUNT[x_bits] > POPCOUNT[o_bits]:
+            return x_bits, o_bits | 1 << action
+        return x_bits | 1 << action, o_bits
+
+    def undo(self, state: Bitboard, action: int) -> Bitboard:
+        """
+        Returns the state before the action was taken
+        """
+        x_bits, o_bits = state
+        bit = 1 << action
+        return x_bits & ~bit, o_bits & ~bit
+
+    def copy_state(self, state: Bitboard) -> List[int]:
+        """
+        Returns the state as a list [x_bits, o_bits] that make_move and unmake_move can change
+        """
+        x_bits, o_bits = state
+        return [x_bits, o_bits]
+
+    def make_move(self, state: List[int], action: int, player: int = None) -> int:
+        """
+        Sets the bit of the cell 'action' in the marks of 'player' of a state
+        made by copy_state, the player to move by default
+        """
+        if player is None:
+            player = self.to_move(state)
+        if player == 1:
+            state[0] |= 1 << action
+        else:
+            state[1] |= 1 << action
+        return player
+
+    def unmake_move(self, state: List[int], action: int):
+        """
+        Takes back the move 'action' made with make_move
+        """
+        bit = ~(1 << action)
+        state[0] &= bit
+        state[1] &= bit
+
+    def is_terminal(self, state: Bitboard = None, player: int = None) -> bool:
+        """
+        Determines if the game is in a terminal state
+        """
+        if state is None:
+            state = self.state
+        x_bits, o_bits = state
+        return (x_bits | o_bits == FULL_BOARD
+                or WIN_TABLE[x_bits] or WIN_TABLE[o_bits])
+
+    def to_move(self, state: Bitboard) -> int:
+        """
+        Returns the player to move in the state, 1 for X and -1 for O
+        """
+        x_bits, o_bits = state
+        return 1 if POPCOUNT[x_bits] == POPCOUNT[o_bits] else -1
+
+    def state_key(self, state: Bitboard):
+        """
+        Returns a hashable key identifying the state, the same for a tuple
+        and for a list made by copy_state
+        """
+        return tuple(state)
+
+    def cells(self, state: Bitboard) -> List[int]:
+        """
+        Returns the state as a list of cells
+        """
+        return self.to_list(state)
+
+    def cells_logic(self) -> TicTacToe:
+        """
+        Returns the game logic of the list states returned by cells()
+        """
+        return TicTacToe()
+
+    def canonical(self, state: Bitboard) -> (Bitboard, int):
+        """
+        Returns the smallest symmetric form of the state and the symmetry that produces it
+        """
+        x_bits, o_bits = state
+        best = (x_bits, o_bits)
+        best_symmetry = 0
+        for k in range(1, 8):
+            table = SYMMETRY_BITS[k]
+            transformed = (table[x_bits], table[o_bits])
+            if transformed < best:
+                best = transformed
+                best_symmetry = k
+        return best, best_symmetry
+
+    def unique_actions(self, state: Bitboard) -> List[int]:
+        """
+        Returns one action of every group of actions that lead to symmetric states
+        """
+        actions = self.actions(state)
+        x_bits, o_bits = state
+        stabilizer = [SYMMETRIES[k] for k in range(1, 8)
+                      if SYMMETRY_BITS[k][x_bits] == x_bits
+                      and SYMMETRY_BITS[k][o_bits] == o_bits]
+        if not stabilizer:
+            return actions
+        return [a for a in actions if all(perm[a] >= a for perm in stabilizer)]
+
+    def reset(self):
+        """
+        Resets the game state
+        """
+        super().reset()
+        self.state = (0, 0)
+
+    def __type__(self):
+        return "BitboardTicTacToe"
+
+    @staticmethod
+    def from_list(cells: List[int]) -> Bitboard:
+        """
+        Converts a list state (1 for X, -1 for O, 0 for empty) to a bitboard
+        """
+        x_bits = 0
+        o_bits = 0
+        for i, cell in enumerate(cells):
+            if cell == 1:
+                x_bits |= 1 << i
+            elif cell == -1:
+                o_bits |= 1 << i
+        return x_bits, o_bits
+
+    @staticmethod
+    def to_list(state: Bitboard) -> List[int]:
+        """
+        Converts a bitboard to a list state (1 for X, -1 for O, 0 for empty)
+        """
+        x_bits, o_bits = state
+        return [1 if x_bits >> i & 1 else -1 if o_bits >> i & 1 else 0
+                for i in range(9)]
+
+    def print_state(self, state: Bitboard = None) -> str:
+        """
+        return pretty print of the game state
+        """
+        if state is None:
+            state = self.state
+        return super().print_state(self.to_list(state))
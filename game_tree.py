@@ -2,16 +2,21 @@
 GameTree class for the game tree
 """
 
+import itertools
 from typing import List
 import networkx as nx
 from networkx.drawing.nx_pydot import graphviz_layout
 from matplotlib import pyplot as plt
 from game_tic_tac_toe import TicTacToe
+from tree_snapshots import TreeSnapshots
 
 
 MAX_LEVEL = 5
 INITIAL_STATE = [0, 0, 0, 0, 0, 0, 0, 0, 0]
 SAVE_TREE_BUILDING = False
+# animation of the tree building, numbered by the trees of a run
+TREE_BUILDING_FILE = "tree_building_{}.gif"
+tree_building_files = itertools.count()
 
 
 class GameTree:
@@ -19,12 +24,30 @@ class GameTree:
     GameTree class
     """
 
-    def __init__(self, initial_state=None):
+    def __init__(self, initial_state=None, canonical=False, cols=3, game_logic=None):
         """
         Initializes the GameTree class
+
+        Args:
+            initial_state (List[int]): state of the game the search starts from
+            canonical (bool): merge the nodes of states that are symmetric to each other
+            cols (int): number of columns of the board, used to draw the node labels
+            game_logic (GameLogic): game of the states, TicTacToe if None. Merging
+                symmetric nodes uses its canonical form.
         """
+        self.canonical = canonical
+        self.cols = cols
+        self.game = game_logic if game_logic is not None else TicTacToe()
         self.G = nx.DiGraph()
-        root_ply = [0, INITIAL_STATE, 1]
+        self.snapshots = None
+        # the animation starts with the first edge, a tree that is never searched makes no file
+        self.save_building = SAVE_TREE_BUILDING
+        root_state = INITIAL_STATE
+        if initial_state is not None:
+            root_state = [0] * len(initial_state)
+        elif game_logic is not None:
+            root_state = [0] * len(game_logic.cells(game_logic.state))
+        root_ply = [0, root_state, 1]
         self.add_node(root_ply)
         if initial_state is not None:
             packed_state = [0, initial_state, -1]
@@ -35,7 +58,9 @@ class GameTree:
         Generates a unique id for the node
         """
         # Convert state to tuple if it is not
-        if not isinstance(state, tuple):
+        if self.canonical:
+            state, _ = self.canonical_key(state)
+        elif not isinstance(state, tuple):
             state = tuple(state)
 
         level = 0
@@ -47,6 +72,14 @@ class GameTree:
         # Generate id
         return "#".join([str(level), str(state), str(player)])
 
+    def canonical_key(self, state) -> (tuple, int):
+        """
+        Returns the canonical form of the state as a tuple and the symmetry that
+        maps the state to it, the state itself for games without symmetries
+        """
+        key, symmetry = self.game.canonical(state)
+        return tuple(key), symmetry
+
     def add_node(self, packed_state):
         """
         Adds a node to the graph
@@ -58,6 +91,9 @@ class GameTree:
         node_id = self.generate_id(state, level, player)
         if node_id not in self.G:
             self.G.add_node(node_id)
+            if self.canonical:
+                # the node stands for all symmetric states, its best move is for this one
+                state = list(self.canonical_key(state)[0])
             self.G.nodes[node_id]['state'] = state
             level = 0
             for mark in state:
@@ -68,6 +104,8 @@ class GameTree:
             # player can also be calculated based on level
             self.G.nodes[node_id]['player'] = player
             self.G.nodes[node_id]['value'] = None
+            if self.snapshots is not None:
+                self.snapshots.add_node(node_id, level)
 
 
     def add_edge(self, parent: List, child: List):
@@ -82,11 +120,11 @@ class GameTree:
 
         parent_id = self.generate_id(parent_state, parent_level, parent_player)
         child_id = self.generate_id(child_state, child_level, child_player)
+        if self.save_building and self.snapshots is None:
+            self.start_snapshots()
         self.G.add_edge(parent_id, child_id)
-        if SAVE_TREE_BUILDING:
-            # save pic every 10 nodes
-            if len(self.G.nodes) % 10 == 0:
-                self.plot_mini_max_tree(shold_plot=False, label_type="state")
+        if self.snapshots is not None:
+            self.snapshots.add_edge(parent_id, child_id)
 
 
     def update_node_value(self, packed_state, value):
@@ -100,22 +138,50 @@ class GameTree:
         # check if node exists
         if node_id in self.G:
             self.G.nodes[node_id]['value'] = value
+            if self.snapshots is not None:
+                self.snapshots.set_value(node_id, value)
+
+    def start_snapshots(self):
+        """
+        Starts the animation of the tree building with the nodes added so far
+        """
+        # a frame every 10 nodes, drawn in a separate process
+        self.snapshots = TreeSnapshots(TREE_BUILDING_FILE.format(next(tree_building_files)),
+                                       every=10, levels=MAX_LEVEL + 1)
+        for node_id, data in self.G.nodes(data=True):
+            self.snapshots.add_node(node_id, data['level'])
+            if data['value'] is not None:
+                self.snapshots.set_value(node_id, data['value'])
+
+    def close(self):
+        """
+        Finishes the animation of the tree building, if it is saved
+        """
+        self.save_building = False
+        if self.snapshots is not None:
+            self.snapshots.close()
+            self.snapshots = None
 
     def get_path(self, state):
         """
         Returns the path from the root to the node with the given state
         """
         cur = state
-        game = TicTacToe()
+        game = self.game
         cur_level = 0
         for mark in cur:
             if mark != 0:
                 cur_level += 1
         cur_player = 1 if cur_level % 2 == 0 else -1
-        best_move = self.G.nodes[self.generate_id(
-            cur, cur_level, cur_player)]['best_move']
+        # nodes deeper than MAX_LEVEL or settled by the table have no best move
+        best_move = self.G.nodes.get(self.generate_id(
+            cur, cur_level, cur_player), {}).get('best_move')
         if best_move is None:
             return
+        if self.canonical:
+            # the best move is stored for the canonical form of the state
+            _, symmetry = self.canonical_key(cur)
+            best_move = game.from_canonical_move(best_move, symmetry)
         result = game.result(cur, best_move)
         if game.is_terminal(cur) is False:
             self.get_path(result)
@@ -130,7 +196,19 @@ class GameTree:
         if level > MAX_LEVEL:
             return
         node_id = self.generate_id(state, level, player)
-        self.G.nodes[node_id]['best_move'] = move
+        if node_id in self.G:
+            if self.canonical and move is not None:
+                _, symmetry = self.canonical_key(state)
+                move = self.game.to_canonical_move(move, symmetry)
+            self.G.nodes[node_id]['best_move'] = move
+
+    def board_label(self, state: List[int]) -> str:
+        """
+        Returns the board of a node as rows of X, O and spaces
+        """
+        symbols = {1: 'X', -1: 'O'}
+        return '\n'.join(' '.join(symbols.get(cell, ' ') for cell in state[i:i + self.cols])
+                         for i in range(0, len(state), self.cols))
 
     def plot_mini_max_tree(self, label_type="state", shold_plot=True):
         """
@@ -175,7 +253,7 @@ class GameTree:
             nx.draw_networkx_nodes(
                 G, pos, nodelist=even_level_nodes, node_shape='s', node_color='red', alpha=0.5)
             nx.draw_networkx_labels(
-                G, pos, labels={node: '\n'.join([' '.join(['X' if cell == 1 else 'O' if cell == -1 else ' ' for cell in data[label_type][i:i+3]]) for i in range(0, 9, 3)]) for node, data in G.nodes(data=True)}, font_size=6, font_color='black')
+                G, pos, labels={node: self.board_label(data[label_type]) for node, data in G.nodes(data=True)}, font_size=6, font_color='black')
 
             # add utility values to the terminal nodes
             for node, data in G.nodes(data=True):
@@ -236,7 +314,7 @@ class GameTree:
             subgraph, pos, node_shape='s', node_color='lightblue', alpha=0.5)
 
         nx.draw_networkx_labels(
-            subgraph, pos, labels={node: '\n'.join([' '.join(['X' if cell == 1 else 'O' if cell == -1 else ' ' for cell in data['state'][i:i+3]]) for i in range(0, 9, 3)]) for node, data in subgraph.nodes(data=True)}, font_size=6, font_color='black')
+            subgraph, pos, labels={node: self.board_label(data['state']) for node, data in subgraph.nodes(data=True)}, font_size=6, font_color='black')
 
         plt.show()
 
@@ -247,10 +325,10 @@ class GameTree:
         ret = ""
         for node, data in self.G.nodes(data=True):
 
-            board += "\n"
+            board = "\n"
             for i, s in enumerate(data['state']):
                 board += str(s)
-                if i % 3 == 2:
+                if i % self.cols == self.cols - 1:
                     board += "\n"
                 else:
                     board += " "
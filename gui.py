@@ -1,17 +1,189 @@
 """
 This module contains the GUI for the StoneGame and TicTacToe games.
+The canvases are not cleared and redrawn after a move, the canvas models keep
+the ids of their items and only change the items of the cells or piles that
+changed.
+
+- SlotRow draws a row of numbered slots, only the slots in view have items
+- BoardView draws the board of TicTacToe and MNKGame
 """
 
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 import tkinter as tk
+from async_engine import AsyncEngine, DONE, CANCELLED
 from minimax import Minimax
 from game_tic_tac_toe import TicTacToe
 from game_stone_game import StoneGame
+from stone_game_solver import StoneGameSolver
+
+
+# milliseconds between two polls of a running search
+POLL_INTERVAL = 50
+# width and height in pixels of a pile slot
+SLOT_SIZE = 50
+# number of values shown in the status text before it is cut off
+STATUS_VALUES = 20
+
+
+class SlotRow:
+    """
+    SlotRow class
+
+    A row of slots showing one value each, like the remaining piles or the
+    stones a player took. The row shows the values from index 'first' on and
+    only has canvas items for the slots that fit on the canvas, so a move on a
+    pile of thousands of stones changes a handful of items.
+    """
+
+    def __init__(self, canvas: tk.Canvas, y: int, fill: str, selectable: int = None):
+        """
+        Initializes the SlotRow class
+
+        Args:
+            canvas (tk.Canvas): the canvas to draw on
+            y (int): top of the row in pixels
+            fill (str): color of the slots
+            selectable (int): number of slots from the left that can be clicked,
+                they are highlighted in grey and the others in red. No highlight if None.
+        """
+        self.canvas = canvas
+        self.y = y
+        self.fill = fill
+        self.selectable = selectable
+        self.slots = []  # (rectangle id, text id) of the slots in view
+        self.values = []  # value shown in each slot in view
+
+    def visible_slots(self) -> int:
+        """
+        Returns the number of slots that fit on the canvas
+        """
+        return int(self.canvas["width"]) // SLOT_SIZE
+
+    def show(self, values, first: int = 0):
+        """
+        Shows values[first:] in the slots, the values out of view are not read
+        """
+        count = max(0, min(self.visible_slots(), len(values) - first))
+        for i in range(count):
+            value = values[first + i]
+            if i < len(self.slots):
+                if self.values[i] != value:
+                    self.canvas.itemconfig(self.slots[i][1], text=str(value))
+                    self.values[i] = value
+                continue
+            x = SLOT_SIZE * i
+            options = {}
+            if self.selectable is not None:
+                options = {"activefill": 'light grey' if i < self.selectable else 'red',
+                           "activeoutline": 'black'}
+            rectangle = self.canvas.create_rectangle(x, self.y, x + SLOT_SIZE, self.y + SLOT_SIZE,
+                                                     fill=self.fill, outline='black', width=2, **options)
+            text = self.canvas.create_text(x + SLOT_SIZE // 2, self.y + SLOT_SIZE // 2,
+                                           text=str(value), font=("Arial", 14))
+            self.slots.append((rectangle, text))
+            self.values.append(value)
+        while len(self.slots) > count:
+            self.canvas.delete(*self.slots.pop())
+            self.values.pop()
+
+    def show_last(self, values):
+        """
+        Shows the values at the end that fit in view, scrolling the row as it grows
+        """
+        self.show(values, max(0, len(values) - self.visible_slots()))
+
+
+class BoardView:
+    """
+    BoardView class
+
+    Draws the grid once and keeps the items of the mark in every cell, a move
+    creates the items of one mark instead of redrawing the board.
+    """
+
+    def __init__(self, canvas: tk.Canvas):
+        self.canvas = canvas
+        self.size = None  # (rows, cols, cell size) the grid was drawn for
+        self.grid = []
+        self.marks = []  # mark shown in each cell
+        self.items = []  # ids of the items drawing the mark of each cell
+
+    def show(self, state, rows: int, cols: int, size: int):
+        """
+        Shows the cells of the state, only the cells that changed are redrawn
+        """
+        if self.size != (rows, cols, size):
+            self.clear()
+            self.draw_grid(rows, cols, size)
+            self.size = (rows, cols, size)
+            self.marks = [0] * (rows * cols)
+            self.items = [() for _ in range(rows * cols)]
+        for index, mark in enumerate(state):
+            if mark != self.marks[index]:
+                self.canvas.delete(*self.items[index])
+                self.items[index] = self.draw_mark(index, mark, cols, size)
+                self.marks[index] = mark
+        for line in self.grid:
+            # the grid lines stay on top of the marks
+            self.canvas.tag_raise(line)
+
+    def draw_grid(self, rows: int, cols: int, size: int):
+        """
+        Draws the grid lines
+        """
+        for i in range(1, cols):
+            self.grid.append(self.canvas.create_line(
+                size * i, 0, size * i, size * rows, fill="#A9A9A9", width=2))
+        for i in range(1, rows):
+            self.grid.append(self.canvas.create_line(
+                0, size * i, size * cols, size * i, fill="#A9A9A9", width=2))
+
+    def draw_mark(self, index: int, mark: int, cols: int, size: int) -> tuple:
+        """
+        Draws the mark of a cell and returns the ids of its items
+        """
+        row, col = divmod(index, cols)
+        cell_padding = size // 5
+        x1, y1 = col * size + cell_padding, row * size + cell_padding
+        x2, y2 = (col + 1) * size - cell_padding, (row + 1) * size - cell_padding
+        if mark == -1:
+            return (self.canvas.create_oval(
+                x1, y1, x2, y2, outline="#1E90FF", width=4, activeoutline="#ADD8E6"),)
+        if mark == 1:
+            return (self.canvas.create_line(x1, y1, x2, y2, fill="#DAA520", width=4, activewidth=5),
+                    self.canvas.create_line(x2, y1, x1, y2, fill="#DAA520", width=4, activewidth=5))
+        return ()
+
+    def clear(self):
+        """
+        Deletes all items, e.g. when the board size changes
+        """
+        for line in self.grid:
+            self.canvas.delete(line)
+        for items in self.items:
+            if items:
+                self.canvas.delete(*items)
+        self.grid = []
+        self.marks = []
+        self.items = []
+
+
+def format_values(values) -> str:
+    """
+    Returns the values as a list, cut off after STATUS_VALUES values
+    """
+    if len(values) <= STATUS_VALUES:
+        return str(list(values))
+    shown = ", ".join(str(values[i]) for i in range(STATUS_VALUES))
+    return f"[{shown}, ... {len(values) - STATUS_VALUES} more]"
 
 
 class GameGUI:
     """
     StoneGameGUI class
+
+    The computer searches on a worker thread. The GUI polls the search with
+    root.after, shows its progress and applies the move when it is done.
     """
 
     def __init__(self, root, minimax):
@@ -31,6 +203,12 @@ class GameGUI:
             self.frame, text="Reset Game", command=self.reset_game)
         self.change_game_button = tk.Button(
             self.frame, text="Change Game - Beta", command=self.change_game)
+        self.cancel_button = tk.Button(
+            self.frame, text="Cancel", command=self.cancel_search, state=tk.DISABLED)
+        self.move_now_button = tk.Button(
+            self.frame, text="Move Now", command=self.move_now, state=tk.DISABLED)
+        self.engine = AsyncEngine(self.minimax)
+        self.thinking = False
 
         self.original_stones = self.minimax.game.state.copy()
         self.state = []
@@ -38,10 +216,19 @@ class GameGUI:
         self.computer_stones = []
         self.computer_score = 0
         self.player_score = 0
+        self.init_views()
         self.init_labels()
         self.set_styling()
         self.update_status()
 
+    def init_views(self):
+        """
+        Initialize the canvas models
+        """
+        self.pile_row = SlotRow(self.canvas, 0, 'orange', selectable=3)
+        self.player_row = SlotRow(self.canvas, SLOT_SIZE, 'grey')
+        self.computer_row = SlotRow(self.canvas, 2 * SLOT_SIZE, 'red')
+
     def init_labels(self):
         """
         Initialize the labels
@@ -52,6 +239,8 @@ class GameGUI:
             self.root, text="")
         self.score_label = tk.Label(
             self.root, text="")
+        self.progress_bar = ttk.Progressbar(self.root, mode="indeterminate", length=300)
+        self.progress_label = tk.Label(self.root, text="")
 
         self.shuffle_button.grid(row=1, column=0)
         self.take_button.grid(row=1, column=1)
@@ -60,11 +249,16 @@ class GameGUI:
         self.score_label.grid(row=4, column=0)
         self.canvas.grid(row=5, column=0)
         self.change_game_button.grid(row=2, column=1)
+        self.cancel_button.grid(row=2, column=0)
+        self.move_now_button.grid(row=2, column=2)
+        self.progress_bar.grid(row=6, column=0)
+        self.progress_label.grid(row=7, column=0)
 
     def change_game(self):
         """
         Change the game
         """
+        self.engine.cancel()
         if isinstance(self.minimax.game, StoneGame):
             self.minimax = Minimax(TicTacToe())
             self.root.destroy()
@@ -72,7 +266,7 @@ class GameGUI:
             game = TicTacToeGUI(root, self.minimax)
             root.mainloop()
         else:
-            self.minimax = Minimax(StoneGame())
+            self.minimax = StoneGameSolver(StoneGame())
             self.root.destroy()
             root = tk.Tk()
             game = StoneGameGUI(root, self.minimax)
@@ -104,9 +298,72 @@ class GameGUI:
         """
         Make the tree
         """
+        if self.thinking:
+            return
+        if self.minimax.game_tree is None:
+            messagebox.showinfo("Tree", "Tree recording is turned off for this game.")
+            return
         self.minimax.game_tree.plot_mini_max_tree(label_type="state")
 
+    def start_search(self, **options):
+        """
+        Starts the search for the computer's move on the worker thread
+        """
+        self.thinking = True
+        self.engine.start(self.minimax.game.state, **options)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.move_now_button.config(state=tk.NORMAL)
+        self.progress_bar.start(POLL_INTERVAL)
+        self.root.after(POLL_INTERVAL, self.poll_search)
+
+    def poll_search(self):
+        """
+        Shows the progress of the search and applies the move once it is done
+        """
+        try:
+            status = self.engine.poll()
+        except Exception as e:
+            self.stop_thinking()
+            self.engine.take_move()
+            messagebox.showerror("Error", f"The search failed: {e}")
+            return
+        progress = self.engine.progress()
+        if status != DONE and status != CANCELLED:
+            self.progress_label.config(
+                text=f"Thinking... {progress['nodes']} nodes, depth {progress['depth']}")
+            self.root.after(POLL_INTERVAL, self.poll_search)
+            return
+        self.stop_thinking()
+        move = self.engine.take_move()
+        if status == DONE:
+            self.progress_label.config(text=f"Searched {progress['nodes']} nodes")
+            self.apply_computer_move(move)
+        else:
+            self.progress_label.config(text="Search cancelled")
+
+    def stop_thinking(self):
+        """
+        Resets the search widgets
+        """
+        self.thinking = False
+        self.progress_bar.stop()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.move_now_button.config(state=tk.DISABLED)
+
+    def cancel_search(self):
+        """
+        Stops the search without making a move, the computer can be asked to move again
+        """
+        self.engine.cancel()
+
+    def move_now(self):
+        """
+        Makes the computer play the best move it found so far
+        """
+        self.engine.move_now()
+
     def reset_game(self):
+        self.engine.cancel()
         self.minimax.game.reset()
         self.minimax.game.state = self.original_stones.copy()
         self.update_status()
@@ -115,43 +372,22 @@ class GameGUI:
         self.take_stone(index)
 
     def take_stone(self, i):
-        if i > 2 or i < 0:
+        if self.thinking:
+            return
+        if i > 2 or i < 0 or i >= len(self.minimax.game.state):
             messagebox.showerror("Error", "Please select a valid pile.")
         else:
             self.take_stones(i + 1)
 
     def update_status(self):
-        status = f"Remaining Stones: {self.minimax.game.state}"
+        status = f"Remaining Stones: {format_values(self.minimax.game.state)}"
         self.status_label.config(text=status)
         self.score_label.config(
             text=f"Player: {self.player_score} Computer: {self.computer_score}")
-        self.canvas.delete("all")
-        self.piles = []
-        for i in range(len(self.minimax.game.state)):
-            self.piles.append(
-                self.canvas.create_rectangle(50 * i, 0, 50 * (i + 1), 50,
-                                             fill='orange',
-                                             outline='black', width=2, activefill='light grey' if i < 3 else 'red',
-                                             activeoutline='black'))
-            self.canvas.tag_bind(self.piles[i], '<Button-1>',
-                                 lambda event, index=i: self.pile_click(event, index), add='+')
-            self.canvas.create_text(
-                50 * i + 25, 25, text=str(self.minimax.game.state[i]), font=("Arial", 14))
-
-        for i in range(len(self.player_stones)):
-            self.canvas.create_rectangle(
-                50 * i, 50, 50 * (i + 1), 100, fill='grey')
-            self.canvas.create_text(
-                50 * i + 25, 75, text=str(self.player_stones[i]),
-                font=("Arial", 14))
-
+        self.pile_row.show(self.minimax.game.state)
+        self.player_row.show_last(self.player_stones)
         # add stones taken by the computer in red
-        for i in range(len(self.computer_stones)):
-            self.canvas.create_rectangle(
-                50 * i, 100, 50 * (i + 1), 150, fill='red')
-            self.canvas.create_text(
-                50 * i + 25, 125, text=str(self.computer_stones[i]),
-                font=("Arial", 14))
+        self.computer_row.show_last(self.computer_stones)
 
         if len(self.minimax.game.state) == 0:
             self.results()
@@ -170,7 +406,7 @@ class GameGUI:
             self.player_stones.append(stone)
         for i in range(num_stones):
             self.player_score += self.minimax.game.state[i]
-        newState, _ = self.minimax.result(
+        newState, _ = self.minimax.game.result(
             self.minimax.game.state, num_stones)
         self.minimax.game.state = newState
         self.update_status()
@@ -180,11 +416,18 @@ class GameGUI:
         """
         Computer's turn
         """
-        _, action = self.minimax.ply(self.minimax.game.state.copy())
+        if len(self.minimax.game.state) == 0 or self.thinking:
+            return
+        self.start_search()
+
+    def apply_computer_move(self, action: int):
+        """
+        Takes the stones the computer chose
+        """
         for i in range(action):
             self.computer_score += self.minimax.game.state[i]
             self.computer_stones.append(self.minimax.game.state[i])
-        newState, _ = self.minimax.result(
+        newState, _ = self.minimax.game.result(
             self.minimax.game.state, action)
         self.minimax.game.state = newState
         self.update_status()
@@ -216,71 +459,77 @@ class TicTacToeGUI(GameGUI):
     TicTacToeGUI class
     """
 
-    def __init__(self, root, minimax):
+    def __init__(self, root, minimax, time_limit: float = None):
+        """
+        Args:
+            root (tk.Tk): the main window
+            minimax (Minimax): the engine, its game can be a TicTacToe or an MNKGame
+            time_limit (float): seconds the computer may think, needed for boards
+                too big to search to the end
+        """
         super().__init__(root, minimax)
         self.root.title("Tic Tac Toe AI")
         self.canvas.bind("<Button-1>", self.click)
         self.computer_player = -1
+        self.time_limit = time_limit
+
+    def cell_size(self) -> int:
+        """
+        Returns the size in pixels of a board cell
+        """
+        game = self.minimax.game
+        return 300 // max(game.rows, game.cols)
 
     def click(self, event):
         """
         Handle the mouse click event
         """
-        x, y = event.x, event.y
-        row, col = x // 100, y // 100
-        if self.minimax.game.state[row * 3 + col] != 0:
+        game = self.minimax.game
+        size = self.cell_size()
+        row, col = event.y // size, event.x // size
+        if self.thinking or not (0 <= row < game.rows and 0 <= col < game.cols):
             return
-        self.minimax.game.state[row * 3 + col] = - self.computer_player
+        action = row * game.cols + col
+        if game.state[action] != 0 or game.is_terminal(game.state):
+            return
+        game.state = game.result(game.state, action)
         self.update_status()
         if self.minimax.game.is_terminal(self.minimax.game.state):
             self.results()
         else:
             self.computer_turn()
 
-    def update_status(self):
+    def init_views(self):
         """
-        Update tic tac toe status with X and O
+        Initialize the board model
         """
-        self.canvas.delete("all")
         background_color = "#F0F0F0"  # A light grey background for a subtle, modern look
         self.canvas.config(bg=background_color)
+        self.board_view = BoardView(self.canvas)
 
-        for i in range(3):
-            for j in range(3):
-                x1, y1 = i * 100, j * 100
-                x2, y2 = (i + 1) * 100, (j + 1) * 100
-                cell_padding = 20
-                x1 += cell_padding
-                y1 += cell_padding
-                x2 -= cell_padding
-                y2 -= cell_padding
-
-                if self.minimax.game.state[i * 3 + j] == -1:
-                    self.canvas.create_oval(
-                        x1, y1, x2, y2, outline="#1E90FF", width=4, activeoutline="#ADD8E6")
-                elif self.minimax.game.state[i * 3 + j] == 1:
-                    self.canvas.create_line(
-                        x1, y1, x2, y2, fill="#DAA520", width=4, activewidth=5)
-                    self.canvas.create_line(
-                        x2, y1, x1, y2, fill="#DAA520", width=4, activewidth=5)
-
-        # Enhancing grid lines for a modern look
-        for i in range(1, 3):
-            self.canvas.create_line(
-                100 * i, 0, 100 * i, 300, fill="#A9A9A9", width=2)
-            self.canvas.create_line(
-                0, 100 * i, 300, 100 * i, fill="#A9A9A9", width=2)
+    def update_status(self):
+        """
+        Update tic tac toe status with X and O
+        """
+        game = self.minimax.game
+        self.board_view.show(game.cells(game.state), game.rows, game.cols, self.cell_size())
 
     def computer_turn(self):
         """
         Computer's turn
         """
+        if self.thinking or self.minimax.game.is_terminal(self.minimax.game.state):
+            return
         if sum(self.minimax.game.state) == 0:
             self.computer_player = 1
+        self.start_search(time_limit=self.time_limit)
 
-        action = self.minimax.minimax_move(
-            self.minimax.game.state.copy())
-        self.minimax.game.state[action] = self.computer_player
+    def apply_computer_move(self, action: int):
+        """
+        Plays the move the computer chose
+        """
+        self.minimax.game.state = self.minimax.game.result(
+            self.minimax.game.state, action)
         self.update_status()
         if self.minimax.game.is_terminal(self.minimax.game.state):
             self.results()
@@ -336,7 +585,7 @@ class StoneGameGUI(GameGUI):
 
     def reset_game(self):
         self.player_stones = []
-        self.piles = []
+        self.computer_stones = []
         self.player_score = 0
         self.computer_score = 0
         self.minimax.reset()
@@ -0,0 +1,412 @@
+"""
+MCTS class, a Monte Carlo tree search engine for games too big to search to
+the end with Minimax. It plays random games (playouts) from the leaves of a
+growing tree, and the tree grows towards the moves whose playouts went well,
+choosing between the children of a node with the UCT formula.
+
+The engine has the interface of Minimax (minimax_move, search, stop, nodes,
+stats), so the GUIs, AsyncEngine and the benchmarks can use it instead.
+Board games are played through actions, result, is_terminal and utility.
+In StoneGame result also returns the score of the move and a game ends when
+the pile is empty, the player with the higher score wins.
+
+- MCTS is the engine, the tree is kept in arrays, one entry per node
+- _init_worker and _playout run the playouts of a process pool
+"""
+
+import math
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import List
+from game_stone_game import StoneGame
+from search_stats import SearchStats
+
+MAX = 1
+MIN = -1
+
+NO_CHILDREN = -1
+# playouts per search without a time limit
+PLAYOUTS = 1000
+# exploration constant of UCT, sqrt(2) for rewards between -1 and 1 scaled to 0..1
+EXPLORATION = math.sqrt(2)
+
+# state of a worker process, set by _init_worker
+_worker = None
+
+
+def _init_worker(game_logic, scored: bool):
+    """
+    Creates the engine of a worker process, only its playout method is used
+    """
+    global _worker
+    _worker = MCTS(game_logic, scored=scored)
+
+
+def _playout(state, player: int, seed: int) -> float:
+    """
+    Plays a random game in a worker process, see MCTS.playout
+    """
+    return _worker.playout(state, player, random.Random(seed))
+
+
+class MCTS:
+    """
+    MCTS class
+
+    The nodes are stored as a struct of arrays: the children of a node are
+    created together when it is expanded, so they are the consecutive ids
+    first_child[n] .. first_child[n] + child_count[n] - 1. The value of a node
+    is the sum of the rewards of its playouts from the point of view of the
+    player who made the move to the node, between -1 (loss) and 1 (win).
+
+    With workers > 1, 'batch' leaves are selected before their playouts run
+    on a process pool. A selected node counts as a lost playout (virtual loss)
+    until its result arrives, so the leaves of a batch differ.
+    """
+
+    def __init__(self, game_logic, exploration: float = EXPLORATION, workers: int = 1,
+                 batch: int = None, seed: int = None, scored: bool = None):
+        """
+        Initializes the MCTS class
+
+        Args:
+            game_logic (GameLogic): the game to search
+            exploration (float): the constant c of UCT, larger values try more moves
+            workers (int): number of processes running playouts, 1 runs them in this process
+            batch (int): number of leaves selected before their playouts run, 4 per worker by default
+            seed (int): seed of the random playouts
+            scored (bool): result returns (state, score) and the higher score wins,
+                by default True for StoneGame
+        """
+        self.game = game_logic
+        self.exploration = exploration
+        self.workers = workers
+        self.batch = batch or 4 * workers
+        self.random = random.Random(seed)
+        self.scored = isinstance(game_logic, StoneGame) if scored is None else scored
+        self.nodes = 0  # playouts since the engine was created
+        self.stop_requested = False  # set from another thread to stop the search
+        self.stats = SearchStats()  # statistics of the last search
+        self.game_tree = None  # the search tree is not kept as a GameTree
+        self.pool = None
+        self.clear()
+
+    def clear(self):
+        """
+        Empties the tree
+        """
+        self.states = []
+        self.move = array('i')  # move that leads to the node
+        self.score = array('d')  # score of that move in a scored game
+        self.player = array('b')  # player to move in the node
+        self.terminal = array('b')
+        self.first_child = array('i')
+        self.child_count = array('i')
+        self.visits = array('i')
+        self.value = array('d')
+
+    def __len__(self):
+        return len(self.move)
+
+    def add_node(self, state, move: int, score: float, player: int) -> int:
+        """
+        Adds a node and returns its id
+        """
+        node = len(self.move)
+        self.states.append(state)
+        self.move.append(move)
+        self.score.append(score)
+        self.player.append(player)
+        self.terminal.append(self.is_terminal(state))
+        self.first_child.append(NO_CHILDREN)
+        self.child_count.append(0)
+        self.visits.append(0)
+        self.value.append(0.0)
+        return node
+
+    def is_terminal(self, state) -> bool:
+        if self.scored:
+            return not self.game.actions(state)
+        return self.game.is_terminal(state)
+
+    def step(self, state, action: int):
+        """
+        Returns the state after the action and the score of the action
+        """
+        if self.scored:
+            return self.game.result(state, action)
+        return self.game.result(state, action), 0
+
+    def expand(self, node: int):
+        """
+        Creates the children of a node
+        """
+        state = self.states[node]
+        player = self.player[node]
+        self.first_child[node] = len(self.move)
+        actions = self.game.actions(state)
+        for action in actions:
+            child, score = self.step(state, action)
+            self.add_node(child, action, score, -player)
+        self.child_count[node] = len(actions)
+
+    def select_child(self, node: int) -> int:
+        """
+        Returns the child with the highest UCT score, an unvisited child first
+        """
+        first = self.first_child[node]
+        visits = self.visits
+        value = self.value
+        log_visits = math.log(max(1, visits[node]))
+        best = first
+        best_score = -math.inf
+        for child in range(first, first + self.child_count[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            # the mean reward is scaled from -1..1 to 0..1
+            score = (value[child] / n + 1) / 2 + self.exploration * math.sqrt(log_visits / n)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+    def select(self) -> (List[int], float):
+        """
+        Walks down from the root to a leaf, expanding it if it was visited before.
+
+        Returns:
+            the ids of the nodes on the path and the score difference of the
+            path from the point of view of MAX
+        """
+        node = 0
+        path = [node]
+        difference = 0.0
+        while not self.terminal[node]:
+            if self.first_child[node] == NO_CHILDREN:
+                if self.visits[node] == 0 and node != 0:
+                    break
+                self.expand(node)
+            node = self.select_child(node)
+            path.append(node)
+            # the player who moved to the node gained its score
+            difference -= self.player[node] * self.score[node]
+        return path, difference
+
+    def playout(self, state, player: int, rng: random.Random) -> float:
+        """
+        Plays random moves from the state until the game ends.
+
+        Returns:
+            the reward from the point of view of MAX: the utility of the final
+            state, or in a scored game the score difference of the playout
+        """
+        difference = 0.0
+        while not self.is_terminal(state):
+            state, score = self.step(state, rng.choice(self.game.actions(state)))
+            difference += player * score
+            player = -player
+        if self.scored:
+            return difference
+        return self.game.utility(state)
+
+    def reward(self, difference: float, playout: float) -> float:
+        """
+        Returns the reward of a playout for MAX, 1, 0 or -1 in a scored game
+        """
+        if self.scored:
+            total = difference + playout
+            return (total > 0) - (total < 0)
+        return playout
+
+    def backpropagate(self, path: List[int], reward: float, virtual_loss: bool = False):
+        """
+        Adds the reward (for MAX) to the nodes of the path, taking back the
+        virtual loss of a batched selection
+        """
+        for node in path:
+            # the player who moved to the node is the opponent of the player to move
+            self.value[node] -= self.player[node] * reward
+            if virtual_loss:
+                self.value[node] += 1
+            else:
+                self.visits[node] += 1
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """
+        Returns the process pool, starting it on first use
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.game, self.scored))
+        return self.pool
+
+    def close(self):
+        """
+        Shuts the worker processes down
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self):
+        self.clear()
+
+    def stop(self):
+        """
+        Asks a running search to return the best move found so far
+        """
+        self.stop_requested = True
+
+    def run_serial(self, playouts: int):
+        """
+        Runs 'playouts' playouts in this process
+        """
+        for _ in range(playouts):
+            path, difference = self.select()
+            leaf = path[-1]
+            if self.terminal[leaf]:
+                playout = 0.0 if self.scored else self.game.utility(self.states[leaf])
+            else:
+                playout = self.playout(self.states[leaf], self.player[leaf], self.random)
+            self.backpropagate(path, self.reward(difference, playout))
+
+    def run_batch(self, playouts: int):
+        """
+        Selects up to 'playouts' leaves with virtual losses and runs their playouts on the pool
+        """
+        selected = []
+        for _ in range(playouts):
+            path, difference = self.select()
+            selected.append((path, difference))
+            # a virtual loss for the player who moved to each node of the path
+            for node in path:
+                self.visits[node] += 1
+                self.value[node] -= 1
+        pool = self.get_pool()
+        leaves = [path[-1] for path, _ in selected]
+        tasks = [(self.states[leaf], self.player[leaf], self.random.getrandbits(32))
+                 for leaf in leaves if not self.terminal[leaf]]
+        results = iter(pool.map(_playout, *zip(*tasks), chunksize=max(1, len(tasks) // self.workers))
+                       if tasks else [])
+        for (path, difference), leaf in zip(selected, leaves):
+            if self.terminal[leaf]:
+                playout = 0.0 if self.scored else self.game.utility(self.states[leaf])
+            else:
+                playout = next(results)
+            self.backpropagate(path, self.reward(difference, playout), virtual_loss=True)
+
+    def minimax_move(self, state: List[int], player: str = None, depth: int = 0, iterations: int = None,
+                     time_limit: float = None, node_limit: int = None) -> int:
+        """
+        Returns the best move for the player to move, the statistics of the search are in self.stats
+
+        Args:
+            state (List[int]): current state
+            iterations (int): number of playouts, PLAYOUTS by default without a time limit
+            time_limit (float): seconds to search
+            node_limit (int): number of tree nodes after which the search stops
+        """
+        move, _ = self.search(state, depth, iterations, time_limit, node_limit)
+        return move
+
+    def search(self, state: List[int], depth: int = 0, iterations: int = None, time_limit: float = None,
+               node_limit: int = None, iterative: bool = False) -> (int, SearchStats):
+        """
+        Searches the state like minimax_move and returns the best move with the
+        statistics of the search. The search can always be stopped with stop(),
+        'iterative' is accepted for the interface of Minimax.
+        """
+        stats = SearchStats()
+        self.stats = stats
+        start = perf_counter()
+        if iterations is None and time_limit is None:
+            iterations = PLAYOUTS
+        deadline = None if time_limit is None else start + time_limit
+        self.clear()
+        root_player = MAX if self.scored else self.game.to_move(state)
+        self.add_node(state, -1, 0.0, root_player)
+        done = 0
+        while not self.terminal[0] and not self.stop_requested:
+            if iterations is not None and done >= iterations:
+                break
+            if deadline is not None and perf_counter() >= deadline:
+                break
+            if node_limit is not None and len(self) >= node_limit:
+                break
+            count = self.batch if self.workers > 1 else 64
+            if iterations is not None:
+                count = min(count, iterations - done)
+            if self.workers > 1:
+                self.run_batch(count)
+            else:
+                self.run_serial(count)
+            done += count
+        self.stop_requested = False
+        self.nodes += done
+
+        move = self.best_move(0)
+        pv = self.principal_variation()
+        stats.time = perf_counter() - start
+        stats.nodes = done
+        stats.completed_depth = len(pv)
+        stats.best_move = move
+        if move is not None:
+            child = self.child_with_move(0, move)
+            stats.value = root_player * self.value[child] / max(1, self.visits[child])
+        stats.principal_variation = pv
+        return move, stats
+
+    def child_with_move(self, node: int, move: int) -> int:
+        first = self.first_child[node]
+        for child in range(first, first + self.child_count[node]):
+            if self.move[child] == move:
+                return child
+        return None
+
+    def best_move(self, node: int) -> int:
+        """
+        Returns the move of the most visited child, None for a leaf
+        """
+        if self.first_child[node] == NO_CHILDREN or self.child_count[node] == 0:
+            return None
+        first = self.first_child[node]
+        best = max(range(first, first + self.child_count[node]), key=self.visits.__getitem__)
+        return self.move[best]
+
+    def principal_variation(self) -> List[int]:
+        """
+        Returns the moves of the most visited path from the root
+        """
+        pv = []
+        node = 0
+        move = self.best_move(node)
+        while move is not None:
+            pv.append(move)
+            node = self.child_with_move(node, move)
+            move = self.best_move(node)
+        return pv
+
+
+if __name__ == "__main__":
+    from game_mnk import MNKGame
+    from stone_game_solver import StoneGameSolver
+
+    game = MNKGame(5, 5, 4)
+    engine = MCTS(game, seed=0)
+    move, stats = engine.search(game.state, time_limit=1.0)
+    print(f"5x5x4: move {move}, {stats.nodes} playouts, {len(engine)} nodes, pv {stats.principal_variation}")
+
+    stones = StoneGame()
+    pile = [random.randint(0, 10) for _ in range(200)]
+    move, stats = MCTS(stones, seed=0).search(pile, iterations=2000)
+    print(f"StoneGame of {len(pile)} piles: MCTS takes {move}, "
+          f"perfect play takes {StoneGameSolver(stones).minimax_move(pile)}")
@@ -3,33 +3,31 @@ This module contains the Minimax class which is used to determine the winner of
 by using the minimax algorithm.
 """
 from math import inf
+from time import perf_counter
 from typing import List
 from game_tic_tac_toe import TicTacToe
-from game_tree import GameTree
+from transposition_table import TranspositionTable, EXACT, LOWER, UPPER, LRU
+from tree_recorder import TreeRecorder, FullRecorder
+from move_ordering import MoveOrdering
+from solver import PerfectPlayTable
+from search_stats import SearchStats, SearchHooks
 
 MAX = 1
 MIN = -1
 
+# the time and node budget is checked every BUDGET_CHECK_INTERVAL + 1 nodes
+BUDGET_CHECK_INTERVAL = 255
+# width of the null window of principal variation search, smaller than the
+# difference between any two values of the games
+NULL_WINDOW = 1e-6
+# half width of the aspiration window around the value of the previous depth
+ASPIRATION_WINDOW = 0.1
 
-def build_tree(func):
+
+class SearchTimeout(Exception):
     """
-    Decorator function to build the game tree
+    Raised inside the search when the time or node budget is used up
     """
-    def wrapper(self, state, alpha, beta, depth, iterations):
-        player = MIN
-        if depth % 2 == 0:
-            player = MAX
-        parent = [depth - 1, state, player]  # parent node
-        childs = [self.game.result(state, a) for a in self.game.actions(state)]
-        for child in childs:
-            self.game_tree.add_node([depth + 1, child, -player])
-            self.game_tree.add_edge(parent, [depth + 1, child, -player])
-            if self.game.is_terminal(child):
-                self.game_tree.update_node_value(
-                    [depth + 1, child, -player], self.game.utility(child))
-
-        return func(self, state, alpha, beta, depth, iterations)
-    return wrapper
 
 
 class Minimax:
@@ -37,21 +35,75 @@ class Minimax:
     Minimax class
     """
 
-    def __init__(self, game_logic: TicTacToe):
+    def __init__(self, game_logic: TicTacToe, tt_size: int = 100000, tt_policy: str = LRU,
+                 symmetry: bool = False, recorder: TreeRecorder = None, ordering: MoveOrdering = None,
+                 table: PerfectPlayTable = None, in_place: bool = False, hooks: List[SearchHooks] = None,
+                 negamax: bool = False):
         """
         Initializes the Minimax class
+
+        Args:
+            game_logic (GameLogic): the game to search
+            tt_size (int): maximum number of cached positions, 0 or None disables the cache
+            tt_policy (str): eviction policy of the cache, "lru" or "fifo"
+            symmetry (bool): key the cache and the game tree on the canonical form of
+                the states and skip moves that lead to symmetric states
+            recorder (TreeRecorder): collects the game tree during the search, a
+                FullRecorder by default. Use a NullRecorder to search without a tree.
+            ordering (MoveOrdering): decides the order moves are searched in, e.g.
+                KillerHistoryOrdering. By default only the cached best move goes first.
+            table (PerfectPlayTable): solved table, or the path of one, that answers
+                moves with a lookup. States that are not in the table are searched.
+            in_place (bool): search a single copy of the state, made by the game's
+                copy_state, with make_move and unmake_move instead of creating a
+                new state at every node. The game tree is not recorded on this path.
+            hooks (List[SearchHooks]): callbacks that get the statistics of every search
+            negamax (bool): search with negamax and principal variation search instead of
+                max_value and min_value. Iterative deepening then starts every depth
+                with an aspiration window around the value of the previous one.
+                The state is not changed in place in this mode.
         """
         self.game = game_logic
-        self.game_tree = GameTree()
+        self.symmetry = symmetry
+        self.tt = TranspositionTable(tt_size, tt_policy) if tt_size else None
+        if recorder is None:
+            recorder = FullRecorder(canonical=symmetry)
+        self.recorder = recorder
+        self.recorder.attach(game_logic)
+        self.ordering = ordering if ordering is not None else MoveOrdering()
+        if isinstance(table, str):
+            table = PerfectPlayTable(table, game_logic)
+        self.table = table
+        self.in_place = in_place
+        self.negamax = negamax
+        self.pv = []  # principal variation of the last negamax search
+        self.nodes = 0  # nodes visited by all searches
+        self.horizon_count = 0  # nodes whose value was estimated at the depth limit
+        self.deadline = None
+        self.node_limit = None
+        self.completed_depth = 0
+        self.stop_requested = False  # set from another thread to stop the search
+        self.hooks = list(hooks) if hooks else []
+        self.stats = SearchStats()  # statistics of the last search
 
-    def play(self, state: List[int], iterations: int = 4, player="max"):
+    @property
+    def game_tree(self):
+        """
+        The game tree recorded so far, None if the recorder does not keep one
+        """
+        return self.recorder.tree
+
+    def play(self, state: List[int], iterations: int = inf, player="max"):
         """
         Determines the winner of the game
         """
         self.state = state
-        self.game_tree = GameTree(state)
-        dif, _ = self.max_value(state, -float('inf'),
-                                float('inf'), depth=0, iterations=iterations)
+        self.recorder.reset(state)
+        if self.negamax:
+            dif, _ = self.negamax_root(state, 0, iterations)
+        else:
+            dif, _ = self.max_value(state, -float('inf'),
+                                    float('inf'), depth=0, iterations=iterations)
         if dif > 0:
             return "Max"
         elif dif < 0:
@@ -59,61 +111,292 @@ class Minimax:
         else:
             return "Tie"
 
-    def minimax_move(self, state: List[int], player: str = None, depth: int = 0, iterations: int = 10) -> (int, int):
+    def minimax_move(self, state: List[int], player: str = None, depth: int = 0, iterations: int = 10,
+                     time_limit: float = None, node_limit: int = None) -> (int, int):
         """
-        Returns the best move for the computer
+        Returns the best move for the computer, the statistics of the search are in self.stats
+
+        Args:
+            state (List[int]): current state
+            iterations (int): maximum number of plies to search
+            time_limit (float): seconds to search, turns on iterative deepening
+            node_limit (int): nodes to search, turns on iterative deepening
         """
-        cur_depth = 0
-        for cell in state:
-            if cell != 0:
-                cur_depth += 1
-        if cur_depth % 2 == 0:
-            # max player
-            _, move = self.max_value(
-                state, -float('inf'), float('inf'), depth, iterations)
-        else:
-            # min player
-            _, move = self.min_value(
-                state, -float('inf'), float('inf'), depth, iterations)
+        move, _ = self.search(state, depth, iterations, time_limit, node_limit)
         return move
 
-    @build_tree
-    def max_value(self, state: List[int], alpha: int, beta: int, depth: int, iterations: int = 10) -> (int, int):
+    def search(self, state: List[int], depth: int = 0, iterations: int = 10, time_limit: float = None,
+               node_limit: int = None, iterative: bool = False) -> (int, SearchStats):
+        """
+        Searches the state like minimax_move and returns the best move with the
+        statistics of the search. With 'iterative' the search deepens step by
+        step even without a budget, so a stop() still leaves a best move.
+        """
+        stats = SearchStats()
+        self.stats = stats
+        for hook in self.hooks:
+            hook.search_started(state, stats)
+        nodes = self.nodes
+        cutoffs = self.ordering.cutoffs
+        hits, misses = (self.tt.hits, self.tt.misses) if self.tt is not None else (0, 0)
+        start = perf_counter()
+        self.pv = []
+
+        try:
+            self.recorder.begin(state, depth)
+            move = self.table_move(state)
+            if move is not None:
+                stats.from_table = True
+                stats.best_move = move
+            elif iterative or time_limit is not None or node_limit is not None:
+                move = self.iterative_deepening(state, iterations, time_limit, node_limit, depth)
+            else:
+                try:
+                    value, move = self.search_root(state, depth, iterations)
+                    stats.add_iteration(iterations, perf_counter() - start, self.nodes - nodes, value, move)
+                except SearchTimeout:
+                    # stopped before the search finished
+                    move = self.fallback_move(state)
+
+            stats.time = perf_counter() - start
+            stats.nodes = self.nodes - nodes
+            stats.cutoffs = self.ordering.cutoffs - cutoffs
+            if self.tt is not None:
+                stats.cache_hits = self.tt.hits - hits
+                stats.cache_lookups = self.tt.hits + self.tt.misses - hits - misses
+            stats.best_move = move
+            if self.negamax and self.pv and self.pv[0] == move and not stats.from_table:
+                stats.principal_variation = self.extend_pv(state, self.pv)
+            else:
+                stats.principal_variation = self.principal_variation(state, move)
+            for hook in self.hooks:
+                hook.search_finished(stats)
+        finally:
+            # a stop() only ends the search it was meant for
+            self.stop_requested = False
+        return move, stats
+
+    def table_move(self, state: List[int]) -> int:
+        """
+        Returns the best move of the state from the solved table, None without a
+        table or if the state is not in it
+        """
+        if self.table is None:
+            return None
+        entry = self.table.lookup(state)
+        if entry is None:
+            return None
+        return entry[1]
+
+    def search_root(self, state: List[int], depth: int, iterations: int, first_move: int = None,
+                    guess=None) -> (int, int):
+        """
+        Searches the state for the player to move with a full window, or with an
+        aspiration window around 'guess' in negamax mode
+        """
+        if self.negamax:
+            value, pv = self.negamax_root(state, depth, iterations, first_move, guess)
+            self.pv = pv
+            return value, pv[0] if pv else None
+        if self.in_place:
+            return self.search_in_place(state, depth, iterations, first_move)
+        if self.game.to_move(state) == MAX:
+            # max player
+            return self.max_value(
+                state, -float('inf'), float('inf'), depth, iterations, first_move)
+        # min player
+        return self.min_value(
+            state, -float('inf'), float('inf'), depth, iterations, first_move)
+
+    def iterative_deepening(self, state: List[int], max_depth: int = 10, time_limit: float = None,
+                            node_limit: int = None, depth: int = 0) -> int:
+        """
+        Searches 1, 2, 3... plies deep until the budget is used up and returns the
+        best move of the last depth that was searched completely. Each depth tries
+        the best move of the previous one first, and with the transposition table
+        the best moves of the inner nodes too, which makes the pruning stronger.
+        Stops early once a search reaches the end of the game on every line.
+        """
+        self.deadline = None if time_limit is None else perf_counter() + time_limit
+        self.node_limit = None if node_limit is None else self.nodes + node_limit
+        self.completed_depth = 0
+        best_move = None
+        value = None
+        try:
+            for iterations in range(1, max_depth + 1):
+                horizon_count = self.horizon_count
+                nodes = self.nodes
+                start = perf_counter()
+                value, move = self.search_root(state, depth, iterations, best_move, value)
+                best_move = move
+                self.completed_depth = iterations
+                self.stats.add_iteration(iterations, perf_counter() - start, self.nodes - nodes, value, move)
+                for hook in self.hooks:
+                    hook.depth_completed(iterations, self.stats)
+                if self.horizon_count == horizon_count:
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+            self.node_limit = None
+        if best_move is None:
+            # not even the first depth finished
+            best_move = self.fallback_move(state)
+        return best_move
+
+    def fallback_move(self, state: List[int]) -> int:
+        """
+        Returns the first move to search, for a search stopped before it found
+        a best move. None if the game is over.
+        """
+        moves = self.moves(state)
+        return moves[0] if moves else None
+
+    def visit(self, depth: int):
+        """
+        Counts a node at 'depth' and checks the budget every BUDGET_CHECK_INTERVAL + 1 nodes
+        """
+        self.nodes += 1
+        self.stats.visit(depth)
+        if self.nodes & BUDGET_CHECK_INTERVAL == 0:
+            self.check_budget()
+
+    def principal_variation(self, state: List[int], move: int, max_length: int = None) -> List[int]:
+        """
+        Returns the expected line of play from the state: the best move, then
+        the best moves of the exact entries of the transposition table
+        """
+        pv = []
+        seen = set()
+        while move is not None and (max_length is None or len(pv) < max_length):
+            pv.append(move)
+            state = self.game.result(state, move)
+            if self.tt is None or self.game.is_terminal(state):
+                break
+            key, symmetry = self.cache_key(state, self.game.to_move(state))
+            entry = self.tt.peek(key)
+            if entry is None or entry.flag != EXACT or key in seen:
+                break
+            seen.add(key)
+            move = self.cached_move(entry, symmetry)
+        return pv
+
+    def stop(self):
+        """
+        Asks the running search to stop, iterative deepening then returns the
+        best move of the last completed depth. The request is cleared when the
+        search returns. Safe to call from another thread.
+        """
+        self.stop_requested = True
+
+    def check_budget(self):
+        """
+        Stops the search by raising SearchTimeout if the budget is used up or a stop was requested
+        """
+        if self.stop_requested:
+            raise SearchTimeout()
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout()
+
+    def horizon(self, state: List[int], depth: int):
+        """
+        Returns the estimated value of a state where the search is cut off
+        """
+        self.horizon_count += 1
+        value = self.game.evaluate(state)
+        if self.recorder.enabled:
+            self.recorder.set_value(state, depth, value)
+        return value
+
+    def max_value(self, state: List[int], alpha: int, beta: int, depth: int, iterations: int = 10,
+                  first_move: int = None) -> (int, int):
         """
         Returns the maximum value and the action that leads to that value
         """
+        record = self.recorder.enabled
+        self.visit(depth)
         if self.game.is_terminal(state):
             utility = self.game.utility(state)
+            if record:
+                self.recorder.set_value(state, depth, utility)
             return utility, None
+        if iterations <= 0:
+            return self.horizon(state, depth), None
+
+        key = None
+        if self.tt is not None:
+            key, symmetry = self.cache_key(state, MAX)
+            entry = self.tt.lookup(key)
+            if entry is not None:
+                if self.settles(entry, alpha, beta, iterations):
+                    return entry.value, self.cached_move(entry, symmetry)
+                if first_move is None:
+                    first_move = self.cached_move(entry, symmetry)
+        window = (alpha, beta)
+        horizon_count = self.horizon_count
 
         best_move = None
         v = -inf  # initial value of max node
-        for a in self.game.actions(state):
-            # TODO: implemet killer move heuristic
+        actions = self.ordering.order(self.moves(state), depth, MAX, first_move)
+        for i, a in enumerate(actions):
             new_state = self.game.result(state, a)
+            if record:
+                self.recorder.add_child(state, new_state, depth)
             v2, _ = self.min_value(
                 new_state, alpha, beta, depth + 1, iterations - 1)
-            if v <= v2:
+            if v2 > v or best_move is None:
                 v = v2
                 best_move = a
             alpha = max(alpha, v2)
             if beta <= v:
+                self.ordering.cutoff(a, depth, MAX, iterations, i)
+                if record:
+                    self.recorder.add_pruned(state, actions[i + 1:], depth)
                 break
+        if key is not None:
+            exact = self.horizon_count == horizon_count
+            self.store(key, v, window, best_move, symmetry, inf if exact else iterations)
+        if record:
+            self.recorder.set_value(state, depth, v)
+            self.recorder.set_best_move(state, depth, best_move)
         # updating best move and value wile backtracking
         return v, best_move
 
-    @build_tree
-    def min_value(self, state: List[int], alpha: int, beta: int, depth: int, iterations: int = 10) -> (int, int):
+    def min_value(self, state: List[int], alpha: int, beta: int, depth: int, iterations: int = 10,
+                  first_move: int = None) -> (int, int):
         """
         Returns the minimum value and the action that leads to that value
         """
+        record = self.recorder.enabled
+        self.visit(depth)
         v = inf
         best_move = None
         if self.game.is_terminal(state, MIN):
             v = self.game.utility(state, MIN)
+            if record:
+                self.recorder.set_value(state, depth, v)
+        elif iterations <= 0:
+            v = self.horizon(state, depth)
         else:
-            for a in self.game.actions(state):
+            key = None
+            if self.tt is not None:
+                key, symmetry = self.cache_key(state, MIN)
+                entry = self.tt.lookup(key)
+                if entry is not None:
+                    if self.settles(entry, alpha, beta, iterations):
+                        return entry.value, self.cached_move(entry, symmetry)
+                    if first_move is None:
+                        first_move = self.cached_move(entry, symmetry)
+            window = (alpha, beta)
+            horizon_count = self.horizon_count
+            actions = self.ordering.order(self.moves(state), depth, MIN, first_move)
+            for i, a in enumerate(actions):
                 new_state = self.game.result(state, a)
+                if record:
+                    self.recorder.add_child(state, new_state, depth)
                 v2, a2 = self.max_value(
                     new_state, alpha, beta, depth + 1, iterations-1)
                 if v2 < v:
@@ -121,5 +404,239 @@ class Minimax:
                     v = v2
                 beta = min(beta, v2)
                 if v <= alpha:
+                    self.ordering.cutoff(a, depth, MIN, iterations, i)
+                    if record:
+                        self.recorder.add_pruned(state, actions[i + 1:], depth)
                     break
+            if key is not None:
+                exact = self.horizon_count == horizon_count
+                self.store(key, v, window, best_move, symmetry, inf if exact else iterations)
+            if record:
+                self.recorder.set_value(state, depth, v)
+                self.recorder.set_best_move(state, depth, best_move)
         return v, best_move
+
+    def negamax_root(self, state: List[int], depth: int, iterations: int, first_move: int = None,
+                     guess=None) -> (int, List[int]):
+        """
+        Searches the state with negamax. With a guess of the value the search
+        starts with a narrow window around it, and searches again with the
+        window opened on the side the value fell out of.
+
+        Returns:
+            the value for MAX and the principal variation
+        """
+        player = self.game.to_move(state)
+        alpha, beta = -inf, inf
+        if guess is not None and abs(guess) != inf:
+            alpha = player * guess - ASPIRATION_WINDOW
+            beta = player * guess + ASPIRATION_WINDOW
+        while True:
+            value, pv = self.negamax_value(state, player, alpha, beta, depth, iterations, first_move)
+            if value <= alpha:
+                alpha = -inf
+            elif value >= beta:
+                beta = inf
+            else:
+                return player * value, pv
+
+    def negamax_value(self, state: List[int], player: int, alpha, beta, depth: int,
+                      iterations: int = 10, first_move: int = None) -> (int, List[int]):
+        """
+        Returns the value of the state for 'player' to move (fail-soft) and the
+        principal variation from it. The first move is searched with the
+        (alpha, beta) window, the other moves with a null window that only
+        tells whether they are better than alpha, and only a move that is
+        searched again with the full window.
+        """
+        record = self.recorder.enabled
+        self.visit(depth)
+        if self.game.is_terminal(state):
+            utility = self.game.utility(state)
+            if record:
+                self.recorder.set_value(state, depth, utility)
+            return player * utility, []
+        if iterations <= 0:
+            return player * self.horizon(state, depth), []
+
+        key = None
+        # the table keeps values for MAX, like max_value and min_value, so the
+        # window is turned around for MIN before it is compared or stored
+        window = (alpha, beta) if player == MAX else (-beta, -alpha)
+        if self.tt is not None:
+            key, symmetry = self.cache_key(state, player)
+            entry = self.tt.lookup(key)
+            if entry is not None:
+                if self.settles(entry, window[0], window[1], iterations):
+                    move = self.cached_move(entry, symmetry)
+                    return player * entry.value, [] if move is None else [move]
+                if first_move is None:
+                    first_move = self.cached_move(entry, symmetry)
+        horizon_count = self.horizon_count
+
+        best_move = None
+        best_pv = []
+        v = -inf
+        actions = self.ordering.order(self.moves(state), depth, player, first_move)
+        for i, a in enumerate(actions):
+            new_state = self.game.result(state, a)
+            if record:
+                self.recorder.add_child(state, new_state, depth)
+            if best_move is None:
+                v2, pv = self.negamax_value(new_state, -player, -beta, -alpha, depth + 1, iterations - 1)
+                v2 = -v2
+            else:
+                v2, pv = self.negamax_value(new_state, -player, -alpha - NULL_WINDOW, -alpha,
+                                            depth + 1, iterations - 1)
+                v2 = -v2
+                if alpha < v2 < beta:
+                    # v2 is a lower bound of the value, a result at or below it means it is the value
+                    bound = v2
+                    v2, pv = self.negamax_value(new_state, -player, -beta, -bound, depth + 1, iterations - 1)
+                    v2 = max(bound, -v2)
+            if v2 > v or best_move is None:
+                v = v2
+                best_move = a
+                best_pv = [a] + pv
+            alpha = max(alpha, v2)
+            if alpha >= beta:
+                self.ordering.cutoff(a, depth, player, iterations, i)
+                if record:
+                    self.recorder.add_pruned(state, actions[i + 1:], depth)
+                break
+        if key is not None:
+            exact = self.horizon_count == horizon_count
+            self.store(key, player * v, window, best_move, symmetry, inf if exact else iterations)
+        if record:
+            self.recorder.set_value(state, depth, player * v)
+            self.recorder.set_best_move(state, depth, best_move)
+        return v, best_pv
+
+    def extend_pv(self, state: List[int], pv: List[int]) -> List[int]:
+        """
+        Continues a principal variation that ends at a cached node with the
+        moves of the exact entries of the transposition table
+        """
+        for move in pv[:-1]:
+            state = self.game.result(state, move)
+        return pv[:-1] + self.principal_variation(state, pv[-1])
+
+    def search_in_place(self, state: List[int], depth: int, iterations: int, first_move: int = None) -> (int, int):
+        """
+        Searches a copy of the state that is changed in place with make_move and
+        unmake_move, the side to move is passed down the search
+        """
+        board = self.game.copy_state(state)
+        return self.value_in_place(board, self.game.to_move(board), -inf, inf, depth, iterations, first_move)
+
+    def value_in_place(self, board: List[int], player: int, alpha: int, beta: int, depth: int,
+                       iterations: int = 10, first_move: int = None) -> (int, int):
+        """
+        Returns the value of the board for 'player' to move and the action that
+        leads to that value. The board is the same when it returns.
+        """
+        game = self.game
+        self.visit(depth)
+        if game.is_terminal(board):
+            return game.utility(board), None
+        if iterations <= 0:
+            self.horizon_count += 1
+            return game.evaluate(board), None
+
+        key = None
+        if self.tt is not None:
+            key, symmetry = self.cache_key(board, player)
+            entry = self.tt.lookup(key)
+            if entry is not None:
+                if self.settles(entry, alpha, beta, iterations):
+                    return entry.value, self.cached_move(entry, symmetry)
+                if first_move is None:
+                    first_move = self.cached_move(entry, symmetry)
+        window = (alpha, beta)
+        horizon_count = self.horizon_count
+
+        best_move = None
+        v = -inf if player == MAX else inf
+        actions = self.ordering.order(self.moves(board), depth, player, first_move)
+        for i, a in enumerate(actions):
+            game.make_move(board, a, player)
+            v2, _ = self.value_in_place(board, -player, alpha, beta, depth + 1, iterations - 1)
+            game.unmake_move(board, a)
+            if player == MAX:
+                if v2 > v or best_move is None:
+                    v = v2
+                    best_move = a
+                alpha = max(alpha, v2)
+                cutoff = beta <= v
+            else:
+                if v2 < v or best_move is None:
+                    v = v2
+                    best_move = a
+                beta = min(beta, v2)
+                cutoff = v <= alpha
+            if cutoff:
+                self.ordering.cutoff(a, depth, player, iterations, i)
+                break
+        if key is not None:
+            exact = self.horizon_count == horizon_count
+            self.store(key, v, window, best_move, symmetry, inf if exact else iterations)
+        return v, best_move
+
+    def settles(self, entry, alpha, beta, iterations) -> bool:
+        """
+        Returns whether a cached entry gives the value of the node without searching it.
+        The entry must be searched at least as deep, and a bound only settles
+        the node when it falls outside the window.
+        """
+        if entry.depth < iterations:
+            return False
+        if (entry.flag == EXACT
+                or entry.flag == LOWER and entry.value >= beta
+                or entry.flag == UPPER and entry.value <= alpha):
+            if entry.depth != inf:
+                # the cached value was estimated at a horizon
+                self.horizon_count += 1
+            return True
+        return False
+
+    def moves(self, state: List[int]) -> List[int]:
+        """
+        Returns the moves to search, without moves to symmetric states if enabled
+        """
+        if self.symmetry:
+            return self.game.unique_actions(state)
+        return self.game.actions(state)
+
+    def cache_key(self, state: List[int], player: int):
+        """
+        Returns the transposition table key of the state and the symmetry
+        that maps the state to its canonical form
+        """
+        if self.symmetry:
+            key, symmetry = self.game.canonical(state)
+            return (key, player), symmetry
+        return (self.game.state_key(state), player), 0
+
+    def cached_move(self, entry, symmetry: int):
+        """
+        Returns the best move of a cached entry on the real board
+        """
+        if entry.best_move is None or not self.symmetry:
+            return entry.best_move
+        return self.game.from_canonical_move(entry.best_move, symmetry)
+
+    def store(self, key, value, window, best_move, symmetry: int = 0, depth=inf):
+        """
+        Stores a search result in the transposition table with its bound type.
+        Values outside the (alpha, beta) window are only bounds of the real value.
+        """
+        alpha, beta = window
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if best_move is not None and self.symmetry:
+            best_move = self.game.to_canonical_move(best_move, symmetry)
+        self.tt.store(key, value, flag, best_move, depth)
@@ -0,0 +1,124 @@
+"""
+Move ordering for the minimax search.
+Alpha-beta prunes the most when the best move is searched first, so the
+search asks a MoveOrdering object for the order of the moves at every node
+and reports every cutoff back to it.
+
+- MoveOrdering keeps the order of GameLogic.actions and only moves the best
+  move of the transposition table or of the previous iteration to the front
+- KillerHistoryOrdering also tries the killer moves of the ply next and sorts
+  the rest by the history heuristic
+"""
+
+from typing import List
+
+# history scores grow with the square of the remaining depth, capped at this depth
+MAX_HISTORY_DEPTH = 32
+
+
+class MoveOrdering:
+    """
+    MoveOrdering class
+
+    Counts the cutoffs of the search and how many of them came from the first
+    move tried, the closer the ratio is to 1 the better the ordering.
+    """
+
+    def __init__(self):
+        """
+        Initializes the MoveOrdering class
+        """
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def order(self, actions: List[int], ply: int, player: int, first_move: int = None) -> List[int]:
+        """
+        Returns the actions in the order they should be searched
+        """
+        if first_move is not None and first_move in actions and actions[0] != first_move:
+            actions.remove(first_move)
+            actions.insert(0, first_move)
+        return actions
+
+    def cutoff(self, action: int, ply: int, player: int, remaining: int, index: int):
+        """
+        Called when 'action', the index-th move tried at a node, caused a cutoff
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+    def first_move_rate(self) -> float:
+        """
+        Returns the ratio of cutoffs caused by the first move tried
+        """
+        if self.cutoffs == 0:
+            return 0.0
+        return self.first_move_cutoffs / self.cutoffs
+
+    def reset(self):
+        """
+        Forgets everything learned during the previous searches
+        """
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def __str__(self):
+        """
+        return pretty print of the cutoff statistics
+        """
+        return (f"{type(self).__name__}(cutoffs={self.cutoffs}, "
+                f"first_move_cutoffs={self.first_move_cutoffs}, "
+                f"first_move_rate={self.first_move_rate():.2%})")
+
+
+class KillerHistoryOrdering(MoveOrdering):
+    """
+    KillerHistoryOrdering class
+
+    Orders the moves of a node as follows:
+    1. the best move from the transposition table or the previous iteration
+    2. the killer moves, the last moves that caused a cutoff at the same ply
+    3. the other moves by their history score, which adds up the cutoffs each
+       move caused anywhere in the tree, weighted by the remaining depth
+    """
+
+    def __init__(self, killers_per_ply: int = 2):
+        """
+        Initializes the KillerHistoryOrdering class
+        """
+        super().__init__()
+        self.killers_per_ply = killers_per_ply
+        self.killers = []
+        self.history = {}
+
+    def order(self, actions: List[int], ply: int, player: int, first_move: int = None) -> List[int]:
+        history = self.history
+        ordered = sorted(actions, key=lambda a: history.get((player, a), 0), reverse=True)
+        front = []
+        if first_move is not None and first_move in actions:
+            front.append(first_move)
+        if ply < len(self.killers):
+            for killer in self.killers[ply]:
+                if killer not in front and killer in actions:
+                    front.append(killer)
+        if not front:
+            return ordered
+        return front + [a for a in ordered if a not in front]
+
+    def cutoff(self, action: int, ply: int, player: int, remaining: int, index: int):
+        super().cutoff(action, ply, player, remaining, index)
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if action in killers:
+            killers.remove(action)
+        killers.insert(0, action)
+        del killers[self.killers_per_ply:]
+        weight = min(remaining, MAX_HISTORY_DEPTH)
+        self.history[(player, action)] = self.history.get((player, action), 0) + weight * weight
+
+    def reset(self):
+        super().reset()
+        self.killers = []
+        self.history = {}
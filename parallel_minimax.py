@@ -0,0 +1,221 @@
+"""
+ParallelMinimax class, a minimax search that splits the root moves across a process pool.
+Every worker process keeps its own Minimax engine (and transposition table) for the
+lifetime of the pool. The best value found so far at the root is kept in shared
+memory, so each worker searches with the best alpha (or beta) known to any worker
+and refreshes it before every move it tries below the root.
+On small games like tic-tac-toe the cost of sending the subtrees to the pool is
+larger than the search itself, see speedup() to measure it for a position.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+from time import perf_counter
+from typing import List
+from minimax import Minimax, MAX
+from search_stats import SearchStats
+from tree_recorder import NullRecorder
+
+# state of a worker process, set by _init_worker
+_engine = None
+_shared_best = None
+
+
+def _init_worker(game_logic, shared_best, engine_options):
+    """
+    Creates the engine of a worker process
+    """
+    global _engine, _shared_best
+    _engine = Minimax(game_logic, recorder=NullRecorder(), **engine_options)
+    _shared_best = shared_best
+
+
+def _publish(score):
+    """
+    Raises the shared best score to 'score' if it is better
+    """
+    with _shared_best.get_lock():
+        if score > _shared_best.value:
+            _shared_best.value = score
+
+
+def _search_root_move(state: List[int], action: int, root_player: int, depth: int, iterations: int):
+    """
+    Searches the subtree of one root move in a worker process.
+    The shared best score (from the point of view of the root player) is the
+    alpha of a max root or the negated beta of a min root.
+
+    Returns:
+        (action, value, exact, nodes), exact is False if the value is only a
+        bound that shows the move is not better than the best one found so far
+    """
+    game = _engine.game
+    nodes = _engine.nodes
+    child = game.result(state, action)
+    if game.is_terminal(child) or iterations <= 1:
+        if root_player == MAX:
+            value, _ = _engine.min_value(child, -inf, inf, depth + 1, iterations - 1)
+        else:
+            value, _ = _engine.max_value(child, -inf, inf, depth + 1, iterations - 1)
+        _publish(value if root_player == MAX else -value)
+        return action, value, True, _engine.nodes - nodes
+
+    if root_player == MAX:
+        # the child is a min node, it is cut off once it falls to the best root score
+        alpha = -inf
+        value = inf
+        for a in _engine.moves(child):
+            alpha = max(alpha, _shared_best.value)
+            if value <= alpha:
+                break
+            v2, _ = _engine.max_value(game.result(child, a), alpha, inf, depth + 2, iterations - 2)
+            value = min(value, v2)
+        exact = value > alpha
+        score = value
+    else:
+        # the child is a max node, it is cut off once it rises to the best root score
+        beta = inf
+        value = -inf
+        for a in _engine.moves(child):
+            beta = min(beta, -_shared_best.value)
+            if value >= beta:
+                break
+            v2, _ = _engine.min_value(game.result(child, a), -inf, beta, depth + 2, iterations - 2)
+            value = max(value, v2)
+        exact = value < beta
+        score = -value
+    if exact:
+        _publish(score)
+    return action, value, exact, _engine.nodes - nodes
+
+
+class ParallelMinimax(Minimax):
+    """
+    ParallelMinimax class
+
+    The first root move is searched alone to get a good bound (young brothers
+    wait), then the other root moves are searched in parallel. The pool is
+    started on the first search and kept until close() is called.
+    Searches with a time or node budget run serially in this process.
+    """
+
+    def __init__(self, game_logic, workers: int = None, ybwc: bool = True, **options):
+        """
+        Initializes the ParallelMinimax class
+
+        Args:
+            game_logic (GameLogic): the game to search
+            workers (int): number of worker processes, the number of CPUs by default
+            ybwc (bool): search the first root move before starting the others
+            options: tt_size, tt_policy, symmetry, ordering and table of the engines,
+                pass the table as a path so the workers can open it
+        """
+        options.pop("recorder", None)
+        super().__init__(game_logic, recorder=NullRecorder(), **options)
+        self.workers = workers or multiprocessing.cpu_count()
+        self.ybwc = ybwc
+        self.options = options
+        self.shared_best = multiprocessing.Value('d', -inf)
+        self.pool = None
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """
+        Returns the process pool, starting it on first use
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(self.game, self.shared_best, self.options))
+        return self.pool
+
+    def close(self):
+        """
+        Shuts the worker processes down
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def minimax_move(self, state: List[int], player: str = None, depth: int = 0, iterations: int = 10,
+                     time_limit: float = None, node_limit: int = None) -> int:
+        """
+        Returns the best move for the computer, searching the root moves in parallel
+        """
+        if time_limit is not None or node_limit is not None or self.table_move(state) is not None:
+            return super().minimax_move(state, player, depth, iterations, time_limit, node_limit)
+        moves = self.moves(state)
+        if len(moves) <= 1 or iterations <= 1:
+            return super().minimax_move(state, player, depth, iterations)
+
+        stats = SearchStats()
+        self.stats = stats
+        start = perf_counter()
+        root_player = self.game.to_move(state)
+        self.shared_best.value = -inf
+        pool = self.get_pool()
+        results = []
+        if self.ybwc:
+            results.append(pool.submit(
+                _search_root_move, state, moves[0], root_player, depth, iterations).result())
+            moves = moves[1:]
+        futures = [pool.submit(_search_root_move, state, a, root_player, depth, iterations)
+                   for a in moves]
+        results += [future.result() for future in futures]
+
+        best_move = None
+        best_score = -inf
+        for action, value, exact, nodes in results:
+            self.nodes += nodes
+            score = value if root_player == MAX else -value
+            if exact and (best_move is None or score > best_score):
+                best_move = action
+                best_score = score
+        stats.add_iteration(iterations, perf_counter() - start, sum(r[3] for r in results),
+                            best_score * root_player, best_move)
+        stats.time = perf_counter() - start
+        stats.nodes = stats.nodes_per_iteration[iterations]
+        stats.principal_variation = [best_move]
+        for hook in self.hooks:
+            hook.search_finished(stats)
+        return best_move
+
+    def speedup(self, state: List[int], iterations: int = 10) -> dict:
+        """
+        Times the same search with the serial max_value / min_value path and with
+        the process pool. Both start with an empty transposition table, the pool
+        is started before timing.
+
+        Returns:
+            dict with the move, time and nodes of both searches and the speedup
+        """
+        serial = Minimax(self.game, recorder=NullRecorder(), **self.options)
+        start = perf_counter()
+        serial_move = serial.minimax_move(state, iterations=iterations)
+        serial_time = perf_counter() - start
+
+        self.close()
+        pool = self.get_pool()
+        # start the workers before timing
+        list(pool.map(abs, range(self.workers)))
+        nodes = self.nodes
+        start = perf_counter()
+        parallel_move = self.minimax_move(state, iterations=iterations)
+        parallel_time = perf_counter() - start
+
+        return {
+            "workers": self.workers,
+            "serial_move": serial_move,
+            "serial_time": serial_time,
+            "serial_nodes": serial.nodes,
+            "parallel_move": parallel_move,
+            "parallel_time": parallel_time,
+            "parallel_nodes": self.nodes - nodes,
+            "speedup": serial_time / parallel_time if parallel_time > 0 else inf,
+        }
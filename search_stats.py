@@ -0,0 +1,152 @@
+"""
+Statistics of a minimax search.
+Minimax fills a SearchStats object during every search and hands it to its
+hooks, so the statistics can be logged or sent to a metrics system without
+plotting the game tree or changing the search functions.
+
+- SearchStats holds the numbers of one search
+- SearchHooks is the interface of the callbacks, all methods do nothing
+- PrintHooks prints a line for every completed depth
+"""
+
+from typing import List
+
+
+class SearchStats:
+    """
+    SearchStats class
+
+    Depths are counted in plies from the start of the game, like the depth
+    argument of the search, so the root is at the depth minimax_move was
+    called with.
+    """
+
+    def __init__(self):
+        """
+        Initializes the SearchStats class
+        """
+        self.nodes = 0
+        self.nodes_per_depth = []  # nodes_per_depth[d] is the number of nodes visited at depth d
+        self.cutoffs = 0
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.time = 0.0
+        self.time_per_depth = {}  # seconds spent on each iterative deepening depth
+        self.nodes_per_iteration = {}  # nodes visited on each iterative deepening depth
+        self.completed_depth = 0
+        self.value = None
+        self.best_move = None
+        self.principal_variation = []
+        self.from_table = False  # True if the move was looked up in a solved table
+
+    def visit(self, depth: int):
+        """
+        Counts a node at 'depth'
+        """
+        counts = self.nodes_per_depth
+        while len(counts) <= depth:
+            counts.append(0)
+        counts[depth] += 1
+
+    def add_iteration(self, depth: int, time: float, nodes: int, value, best_move: int):
+        """
+        Records a completed search to 'depth' plies
+        """
+        self.time_per_depth[depth] = time
+        self.nodes_per_iteration[depth] = nodes
+        self.completed_depth = depth
+        self.value = value
+        self.best_move = best_move
+
+    def effective_branching_factor(self) -> float:
+        """
+        Returns the branching factor a uniform tree would need to have as many
+        nodes at its deepest level as the search, relative to the root level
+        """
+        levels = [(d, n) for d, n in enumerate(self.nodes_per_depth) if n > 0]
+        if len(levels) < 2:
+            return 0.0
+        (root_depth, root_nodes), (last_depth, last_nodes) = levels[0], levels[-1]
+        return (last_nodes / root_nodes) ** (1 / (last_depth - root_depth))
+
+    def nodes_per_second(self) -> float:
+        """
+        Returns the number of nodes visited per second
+        """
+        if self.time <= 0:
+            return 0.0
+        return self.nodes / self.time
+
+    def cache_hit_rate(self) -> float:
+        """
+        Returns the ratio of transposition table lookups that found an entry
+        """
+        if self.cache_lookups == 0:
+            return 0.0
+        return self.cache_hits / self.cache_lookups
+
+    def as_dict(self) -> dict:
+        """
+        Returns the statistics as a dict of plain values, e.g. to dump as JSON
+        """
+        return {
+            "nodes": self.nodes,
+            "nodes_per_depth": list(self.nodes_per_depth),
+            "cutoffs": self.cutoffs,
+            "cache_hits": self.cache_hits,
+            "cache_lookups": self.cache_lookups,
+            "cache_hit_rate": self.cache_hit_rate(),
+            "effective_branching_factor": self.effective_branching_factor(),
+            "time": self.time,
+            "nodes_per_second": self.nodes_per_second(),
+            "time_per_depth": dict(self.time_per_depth),
+            "nodes_per_iteration": dict(self.nodes_per_iteration),
+            "completed_depth": self.completed_depth,
+            "value": self.value,
+            "best_move": self.best_move,
+            "principal_variation": list(self.principal_variation),
+            "from_table": self.from_table,
+        }
+
+    def __str__(self):
+        """
+        return pretty print of the statistics
+        """
+        return (f"SearchStats(nodes={self.nodes}, cutoffs={self.cutoffs}, "
+                f"cache_hits={self.cache_hits}, ebf={self.effective_branching_factor():.2f}, "
+                f"depth={self.completed_depth}, time={self.time:.3f}s, "
+                f"value={self.value}, pv={self.principal_variation})")
+
+
+class SearchHooks:
+    """
+    SearchHooks class, the interface of the search callbacks. All methods do nothing.
+    """
+
+    def search_started(self, state: List[int], stats: SearchStats):
+        """
+        Called when a search starts from 'state'
+        """
+
+    def depth_completed(self, depth: int, stats: SearchStats):
+        """
+        Called when iterative deepening completed the search to 'depth' plies
+        """
+
+    def search_finished(self, stats: SearchStats):
+        """
+        Called when a search finished, with the final statistics
+        """
+
+
+class PrintHooks(SearchHooks):
+    """
+    PrintHooks class, prints the progress of the search
+    """
+
+    def depth_completed(self, depth: int, stats: SearchStats):
+        print(f"depth {depth}: value {stats.value}, move {stats.best_move}, "
+              f"{stats.nodes_per_iteration[depth]} nodes in {stats.time_per_depth[depth]:.3f}s")
+
+    def search_finished(self, stats: SearchStats):
+        print(stats)
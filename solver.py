@@ -0,0 +1,228 @@
+"""
+Retrograde solver for games with a small state space.
+The solver enumerates every state reachable from the initial state, then
+works backwards from the terminal states: a state is solved once all of its
+children are solved, its value is the best value of its children for the
+player to move. The result is a value and a best move for every state, saved
+in a compact binary file that PerfectPlayTable memory-maps, so finding the
+best move later is a single binary search instead of a minimax search.
+
+File layout (little endian):
+    header: magic b"MMPT", version (uint16), reserved (uint16), count (uint64)
+    keys:   count int64, the encoded states in increasing order
+    values: count int8, the minimax value of each state
+    moves:  count int8, the best move of each state, -1 for terminal states
+"""
+
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections import deque
+from typing import List
+
+MAX = 1
+MIN = -1
+
+MAGIC = b"MMPT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+NO_MOVE = -1
+
+
+class RetrogradeSolver:
+    """
+    RetrogradeSolver class
+
+    Works for any GameLogic whose reachable states fit in memory, whose
+    utilities and actions fit in a signed byte, and whose encode_state gives
+    every state a distinct integer.
+    """
+
+    def __init__(self, game_logic):
+        """
+        Initializes the RetrogradeSolver class
+        """
+        self.game = game_logic
+        self.states = []
+        self.keys = []
+        self.values = []
+        self.moves = []
+
+    def enumerate(self, initial_state: List[int]):
+        """
+        Finds every state reachable from the initial state in breadth first order.
+
+        Returns:
+            (children, parents): the (action, child) pairs and the parents of each state
+        """
+        game = self.game
+        index = {game.state_key(initial_state): 0}
+        self.states = [initial_state]
+        children = []
+        parents = [[]]
+        i = 0
+        while i < len(self.states):
+            state = self.states[i]
+            edges = []
+            if not game.is_terminal(state):
+                for a in game.actions(state):
+                    child = game.result(state, a)
+                    key = game.state_key(child)
+                    j = index.get(key)
+                    if j is None:
+                        j = len(self.states)
+                        index[key] = j
+                        self.states.append(child)
+                        parents.append([])
+                    edges.append((a, j))
+                    parents[j].append(i)
+            children.append(edges)
+            i += 1
+        return children, parents
+
+    def solve(self, initial_state: List[int] = None):
+        """
+        Solves every state reachable from the initial state, the state of the
+        game by default. States that are never solved because they lie on a
+        cycle are scored as draws.
+        """
+        game = self.game
+        if initial_state is None:
+            initial_state = game.state
+        children, parents = self.enumerate(initial_state)
+        count = len(self.states)
+        values = [None] * count
+        moves = [NO_MOVE] * count
+        remaining = [len(edges) for edges in children]
+        queue = deque()
+        for i, state in enumerate(self.states):
+            if not children[i]:
+                values[i] = game.utility(state) if game.is_terminal(state) else 0
+                queue.append(i)
+        while queue:
+            i = queue.popleft()
+            for p in parents[i]:
+                remaining[p] -= 1
+                if remaining[p] == 0:
+                    values[p], moves[p] = self.best_child(self.states[p], children[p], values)
+                    queue.append(p)
+        for i in range(count):
+            if values[i] is None:
+                values[i] = 0
+                moves[i] = children[i][0][0]
+        self.keys = [game.encode_state(state) for state in self.states]
+        self.values = values
+        self.moves = moves
+        return self
+
+    def best_child(self, state: List[int], edges: List[tuple], values: List[int]) -> (int, int):
+        """
+        Returns the value of a state whose children are all solved and the
+        first move that reaches it
+        """
+        player = self.game.to_move(state)
+        best_value = None
+        best_move = NO_MOVE
+        for a, j in edges:
+            if best_value is None or values[j] * player > best_value * player:
+                best_value = values[j]
+                best_move = a
+        return best_value, best_move
+
+    def save(self, path: str):
+        """
+        Saves the solved table to a binary file, sorted by key
+        """
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(order)))
+            f.write(struct.pack(f"<{len(order)}q", *(self.keys[i] for i in order)))
+            f.write(struct.pack(f"<{len(order)}b", *(int(self.values[i]) for i in order)))
+            f.write(struct.pack(f"<{len(order)}b", *(self.moves[i] for i in order)))
+
+
+class PerfectPlayTable:
+    """
+    PerfectPlayTable class, a solved table memory-mapped from a file written
+    by RetrogradeSolver.save. Only the pages that are looked up are read.
+    """
+
+    def __init__(self, path: str, game_logic):
+        """
+        Initializes the PerfectPlayTable class
+
+        Args:
+            path (str): file written by RetrogradeSolver.save
+            game_logic (GameLogic): the game the table was solved for, used to encode states
+        """
+        self.game = game_logic
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a solved table")
+        view = memoryview(self.map)
+        start = HEADER.size
+        self.keys = view[start:start + 8 * count].cast("q")
+        start += 8 * count
+        self.values = view[start:start + count].cast("b")
+        start += count
+        self.moves = view[start:start + count].cast("b")
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def find(self, state: List[int]) -> int:
+        """
+        Returns the index of the state in the table, None if it is not in it
+        """
+        key = self.game.encode_state(state)
+        i = bisect_left(self.keys, key)
+        if i < self.count and self.keys[i] == key:
+            return i
+        return None
+
+    def __contains__(self, state: List[int]) -> bool:
+        return self.find(state) is not None
+
+    def lookup(self, state: List[int]) -> (int, int):
+        """
+        Returns the value and the best move of a state, None if the state is not in the table
+        """
+        i = self.find(state)
+        if i is None:
+            return None
+        move = self.moves[i]
+        return self.values[i], None if move == NO_MOVE else move
+
+    def close(self):
+        """
+        Releases the memory map
+        """
+        if self.map is not None:
+            self.keys.release()
+            self.values.release()
+            self.moves.release()
+            self.map.close()
+            self.map = None
+
+
+def load_table(path: str, game_logic, initial_state: List[int] = None) -> PerfectPlayTable:
+    """
+    Memory-maps the solved table of a game, solving and saving it first if the file does not exist
+    """
+    if not os.path.exists(path):
+        RetrogradeSolver(game_logic).solve(initial_state).save(path)
+    return PerfectPlayTable(path, game_logic)
+
+
+if __name__ == "__main__":
+    from game_tic_tac_toe import TicTacToe
+
+    solver = RetrogradeSolver(TicTacToe()).solve()
+    solver.save("tic_tac_toe.table")
+    print(f"Solved {len(solver.keys)} states, value of the empty board: {solver.values[0]}")
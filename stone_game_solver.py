@@ -0,0 +1,150 @@
+"""
+StoneGameSolver class, an exact solver for the stone game.
+Whatever happened before, the rest of the game only depends on the stones
+that are left, a suffix of the pile. So the best score difference the player
+to move can reach from every suffix follows from the shorter suffixes:
+
+    best[i] = max over k of (piles[i] + ... + piles[i + k - 1]) - best[i + k]
+
+One pass from the back of the pile solves every suffix in O(n) time, where a
+minimax search of the game tree would take exponential time.
+"""
+
+from array import array
+from typing import List
+from game_stone_game import StoneGame, PileState
+
+MAX_TAKE = 3
+
+
+class StoneGameSolver:
+    """
+    StoneGameSolver class
+
+    Has the interface of Minimax the GUI uses, so it can replace the minimax
+    engine for the stone game. The solution of the last pile is kept, so the
+    moves of a game, which are played on suffixes of the same pile, do not
+    solve it again.
+    """
+
+    def __init__(self, game_logic: StoneGame = None, max_take: int = MAX_TAKE):
+        """
+        Initializes the StoneGameSolver class
+
+        Args:
+            game_logic (StoneGame): the game to solve, a new StoneGame by default
+            max_take (int): maximum number of stones taken in one move
+        """
+        self.game = game_logic if game_logic is not None else StoneGame()
+        self.max_take = max_take
+        self.game_tree = None  # the solver does not build a game tree
+        self.piles = None
+        self.best = None
+        self.moves = None
+        self.nodes = 0
+
+    def solve(self, piles: List[int]) -> (array, array):
+        """
+        Solves every suffix of the piles.
+
+        Returns:
+            (best, moves): best[i] is the best score difference of the player to
+            move when piles[i:] are left, moves[i] the number of stones to take
+        """
+        n = len(piles)
+        max_take = self.max_take
+        best = array('q', bytes(8 * (n + 1)))
+        moves = array('b', bytes(n + 1))
+        for i in range(n - 1, -1, -1):
+            taken = 0
+            value = None
+            move = 0
+            for k in range(1, min(max_take, n - i) + 1):
+                taken += piles[i + k - 1]
+                v = taken - best[i + k]
+                if value is None or v > value:
+                    value = v
+                    move = k
+            best[i] = value
+            moves[i] = move
+        self.nodes += n
+        self.piles = piles
+        self.best = best
+        self.moves = moves
+        return best, moves
+
+    def solution(self, state: List[int]) -> int:
+        """
+        Returns the index of the state in the solved pile, solving the state
+        first if it is not a suffix of the last pile. A PileState is found by
+        its offset without comparing the stones.
+        """
+        if isinstance(state, PileState):
+            if self.piles is not state.stones:
+                self.solve(state.stones)
+            return state.offset
+        piles = self.piles
+        offset = None if piles is None else len(piles) - len(state)
+        if offset is None or offset < 0 or piles[offset:] != state:
+            self.solve(list(state))
+            offset = 0
+        return offset
+
+    def value(self, state: List[int]) -> int:
+        """
+        Returns the best score difference the player to move can reach
+        """
+        return self.best[self.solution(state)]
+
+    def ply(self, state: List[int]) -> (int, int):
+        """
+        Returns the best score difference and the number of stones to take
+        """
+        i = self.solution(state)
+        return self.best[i], self.moves[i]
+
+    def minimax_move(self, state: List[int], player: str = None, depth: int = 0, iterations: int = None,
+                     time_limit: float = None, node_limit: int = None) -> int:
+        """
+        Returns the best move for the computer, None if no stones are left
+        """
+        if len(state) == 0:
+            return None
+        _, move = self.ply(state)
+        return move
+
+    def reset(self):
+        """
+        Forgets the solved pile
+        """
+        self.piles = None
+        self.best = None
+        self.moves = None
+
+
+def brute_force(piles: List[int], max_take: int = MAX_TAKE) -> int:
+    """
+    Returns the best score difference of the player to move by searching the
+    whole game tree, only usable for small piles
+    """
+    if len(piles) == 0:
+        return 0
+    return max(sum(piles[:k]) - brute_force(piles[k:], max_take)
+               for k in range(1, min(max_take, len(piles)) + 1))
+
+
+if __name__ == "__main__":
+    import random
+    from time import perf_counter
+
+    solver = StoneGameSolver()
+    for _ in range(500):
+        piles = [random.randint(0, 10) for _ in range(random.randint(0, 14))]
+        assert solver.solve(piles)[0][0] == brute_force(piles), piles
+    print("Matches the brute force search on 500 random piles")
+
+    piles = [random.randint(0, 10) for _ in range(1000000)]
+    start = perf_counter()
+    solver.solve(piles)
+    print(f"Solved {len(piles)} stones in {perf_counter() - start:.2f}s, "
+          f"best difference {solver.best[0]}, first move {solver.moves[0]}")
@@ -0,0 +1,26 @@
+"""
+Tests of the tree recorders
+"""
+
+from game_tic_tac_toe import TicTacToe
+from minimax import Minimax
+from tree_recorder import CompactRecorder
+
+
+def test_compact_recorder_from_non_root_depth():
+    state = [1, -1, 0, 0, 0, 0, 0, 0, 0]
+    recorder = CompactRecorder()
+    engine = Minimax(TicTacToe(), recorder=recorder)
+    move = engine.minimax_move(state, depth=2)
+
+    tree = recorder.tree
+    assert list(tree.roots) == [0]
+    assert tree.state(0) == state
+    assert tree.level[0] == 0
+    assert tree.get_best_move(0) == move
+    assert tree.get_value(0) is not None
+    for node in range(1, len(tree)):
+        parent = tree.parent[node]
+        assert tree.level[node] == tree.level[parent] + 1
+        assert sum(1 for cell in tree.state(node) if cell != 0) == \
+            sum(1 for cell in tree.state(parent) if cell != 0) + 1
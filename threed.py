@@ -1,171 +1,418 @@
 """
 This file contains the code for the 3D-like Tic-Tac-Toe game using Pygame.
 """
+import gc
 import math
+from time import perf_counter
 import pygame
 import pygame.gfxdraw
 import numpy as np
 from minimax import Minimax
+from async_engine import AsyncEngine, DONE
 from game_tic_tac_toe import TicTacToe
+from solver import load_table
+from tree_recorder import NullRecorder
+
+# size of the board on the screen in pixels
+BOARD_SIZE = 600
+# the X and O sprites are drawn up to this many pixels past their cell
+SPRITE_OVERHANG = 10
+# faded sprites are cached for this many alpha levels
+FADE_LEVELS = 16
+# seconds a new mark takes to fade in
+FADE_TIME = 0.15
+
+# the frame loop advances the game in fixed steps of STEP seconds
+FPS = 60
+STEP = 1 / FPS
+# at most this many seconds are caught up after a slow frame
+MAX_LAG = 0.25
+# radians per second of the hovering "Play Again?" button
+HOVER_SPEED = 6.0
+
+# scenes
+PLAYING = "playing"
+GAME_OVER = "game over"
+
+
+class Renderer:
+    """
+    Renderer class, draws the board with cached layers.
+    The gradient, glow, grid and lighting never change, so they are drawn once
+    into a background surface, and the X and O are drawn once into sprites.
+    update() only redraws the cells that changed since the last call and
+    returns their rectangles, so an idle board costs nothing.
+    """
+
+    def __init__(self, screen, rows: int, cols: int, cell: int):
+        self.screen = screen
+        self.rows = rows
+        self.cols = cols
+        self.cell = cell
+        self.background = self.render_background()
+        self.sprites = {1: self.render_x(), -1: self.render_o()}
+        self.faded = {}  # sprites with a lower alpha for the move animation
+        self.drawn = None  # the cells as they are on the screen, None if the screen must be redrawn
+
+    def render_background(self) -> pygame.Surface:
+        """
+        Draws the static layers of the board into one surface
+        """
+        # vertical gradient from black to light grey
+        shades = (np.arange(BOARD_SIZE) * 255 / 800).astype(np.uint8)
+        pixels = np.empty((BOARD_SIZE, BOARD_SIZE, 3), dtype=np.uint8)
+        pixels[:, :, :] = shades[np.newaxis, :, np.newaxis]
+        background = pygame.surfarray.make_surface(pixels)
+
+        # glowing effect, iphone pro max shade
+        glow = pygame.Surface((BOARD_SIZE, BOARD_SIZE), pygame.SRCALPHA)
+        glow.fill((160, 160, 152, 100))
+        background.blit(glow, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+
+        # lines around the blocks create a 3D shadow effect
+        cell = self.cell
+        for i in range(1, max(self.rows, self.cols) + 2):
+            color = np.array([0, 0, 0]) + min(i, 4) * np.array([255, 255, 255]) / 5
+            pygame.draw.line(background, color, (cell * i, 0), (cell * i, BOARD_SIZE), 5)
+            pygame.draw.line(background, color, (0, cell * i), (BOARD_SIZE, cell * i), 5)
+
+        # lighting effect
+        lighting = pygame.Surface((BOARD_SIZE, BOARD_SIZE), pygame.SRCALPHA)
+        lighting.fill((255, 255, 255, 100))
+        background.blit(lighting, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        return background.convert()
+
+    def sprite_surface(self) -> pygame.Surface:
+        size = self.cell + SPRITE_OVERHANG
+        return pygame.Surface((size, size), pygame.SRCALPHA)
+
+    def render_x(self) -> pygame.Surface:
+        """
+        Draws an X with a 3D effect, centered on the cell at the top left of the sprite
+        """
+        sprite = self.sprite_surface()
+        center = self.cell // 2
+        arm = self.cell * 3 // 10  # half the size of an X
+        for i in range(10):
+            color = (255 - i * 15, i * 5, 0)
+            pygame.draw.aaline(sprite, color, (center - arm + i, center - arm + i),
+                               (center + arm + i, center + arm + i))
+            pygame.draw.aaline(sprite, color, (center + arm + i, center - arm + i),
+                               (center - arm + i, center + arm + i))
+        return sprite
+
+    def render_o(self) -> pygame.Surface:
+        """
+        Draws an O with a 3D effect, centered on the cell at the top left of the sprite
+        """
+        sprite = self.sprite_surface()
+        center = self.cell // 2
+        radius = self.cell // 4
+        for i in range(10):
+            pygame.gfxdraw.aacircle(sprite, center, center, radius + i, (11, 11, 255 - i * 15))
+        return sprite
+
+    def sprite(self, mark: int, alpha: float = 1.0) -> pygame.Surface:
+        """
+        Returns the sprite of a mark, faded for alpha below 1
+        """
+        if alpha >= 1:
+            return self.sprites[mark]
+        key = (mark, round(alpha * FADE_LEVELS))
+        if key not in self.faded:
+            faded = self.sprites[mark].copy()
+            faded.fill((255, 255, 255, 255 * key[1] // FADE_LEVELS), special_flags=pygame.BLEND_RGBA_MULT)
+            self.faded[key] = faded
+        return self.faded[key]
+
+    def cell_rect(self, index: int) -> pygame.Rect:
+        """
+        Returns the area a cell and its sprite cover on the screen
+        """
+        row, col = divmod(index, self.cols)
+        size = self.cell + SPRITE_OVERHANG
+        return pygame.Rect(col * self.cell, row * self.cell, size, size).clip(self.screen.get_rect())
+
+    def invalidate(self):
+        """
+        Makes the next update redraw the whole board, e.g. after something else was drawn on the screen
+        """
+        self.drawn = None
+
+    def draw_cell(self, cells, index: int, mark: int = None, alpha: float = 1.0) -> pygame.Rect:
+        """
+        Redraws the area of a cell with the background and every sprite that
+        reaches into it, with 'mark' at the given alpha in the cell itself
+        """
+        rect = self.cell_rect(index)
+        self.screen.blit(self.background, rect, rect)
+        self.screen.set_clip(rect)
+        row, col = divmod(index, self.cols)
+        # sprites of the cells above and to the left reach into this cell
+        for r in range(max(row - 1, 0), min(row + 2, self.rows)):
+            for c in range(max(col - 1, 0), min(col + 2, self.cols)):
+                i = r * self.cols + c
+                value = mark if i == index and mark is not None else cells[i]
+                if value in self.sprites:
+                    self.screen.blit(self.sprite(value, alpha if i == index else 1.0),
+                                     (c * self.cell, r * self.cell))
+        self.screen.set_clip(None)
+        return rect
+
+    def update(self, board) -> list:
+        """
+        Draws the cells that changed since the last update.
+
+        Returns:
+            the rectangles of the screen that were redrawn, for pygame.display.update
+        """
+        cells = list(board)
+        if self.drawn is None or len(self.drawn) != len(cells):
+            self.screen.blit(self.background, (0, 0))
+            for i, value in enumerate(cells):
+                if value in self.sprites:
+                    row, col = divmod(i, self.cols)
+                    self.screen.blit(self.sprites[value], (col * self.cell, row * self.cell))
+            self.drawn = cells
+            return [self.screen.get_rect()]
+        dirty = [self.draw_cell(cells, i) for i, value in enumerate(cells) if value != self.drawn[i]]
+        self.drawn = cells
+        return dirty
+
+
+class Tween:
+    """
+    Tween class, an animation driven by the frame time.
+    Calls on_update with the eased progress from 0 to 1 on every step and
+    on_done once the duration has passed.
+    """
+
+    def __init__(self, duration: float, on_update, on_done=None):
+        self.duration = duration
+        self.elapsed = 0.0
+        self.on_update = on_update
+        self.on_done = on_done
+
+    def step(self, dt: float) -> bool:
+        """
+        Advances the animation by dt seconds, returns False once it is finished
+        """
+        self.elapsed = min(self.elapsed + dt, self.duration)
+        t = self.elapsed / self.duration if self.duration > 0 else 1.0
+        self.on_update(1 - (1 - t) * (1 - t))  # ease out
+        if self.elapsed >= self.duration:
+            if self.on_done is not None:
+                self.on_done()
+            return False
+        return True
+
 
 class GameGUI:
     """
     This class is responsible for the graphical user interface of the Tic-Tac-Toe game.
+
+    Everything runs in one loop with a fixed time step: events are handled,
+    the animations and the game advance by STEP seconds as often as the frame
+    time requires, and the frame is drawn. The computer searches on a worker
+    thread, so the frames keep coming while it thinks. The loop has two
+    scenes, the board while playing and the "Play Again?" screen.
     """
-    def __init__(self):
+    def __init__(self, game=None, time_limit=None, table=None):
+        """
+        Args:
+            game (GameLogic): a TicTacToe or an MNKGame, TicTacToe by default
+            time_limit (float): seconds the computer may think, needed for boards
+                too big to search to the end
+            table (PerfectPlayTable): solved table the computer looks its moves up in
+        """
         pygame.init()
-        self.screen = pygame.display.set_mode((600, 600))
+        self.screen = pygame.display.set_mode((BOARD_SIZE, BOARD_SIZE))
         self.clock = pygame.time.Clock()
-        self.game = TicTacToe()
-        self.minimax = Minimax(self.game)
+        self.game = game if game is not None else TicTacToe()
+        self.cell = BOARD_SIZE // max(self.game.rows, self.game.cols)
+        self.renderer = Renderer(self.screen, self.game.rows, self.game.cols, self.cell)
+        self.time_limit = time_limit
+        # no game tree is shown, and recording one makes the garbage collector
+        # hold the interpreter lock for long pauses that drop frames
+        self.minimax = Minimax(self.game, table=table, recorder=NullRecorder())
+        self.engine = AsyncEngine(self.minimax)
         self.board = self.game.state
         self.player_turn = True
+        self.scene = PLAYING
+        self.tweens = []
+        self.fading = {}  # alpha of the marks that are fading in, by cell
+        self.animation_time = 0.0
+        self.error = None  # message of a failed search, shown on the "Play Again?" screen
+        self.running = False
+        self.font = pygame.font.Font('freesansbold.ttf', 32)
+        self.error_font = pygame.font.Font('freesansbold.ttf', 16)
         pygame.display.set_caption("Deep Dark Blue Mini Max Pro")
 
-
     def animate_last_move(self, last_move):
-        # Save the current state of the board
-        current_state = self.board.copy()
+        """
+        Starts fading the last move in
+        """
+        def fade(alpha):
+            self.fading[last_move] = alpha
 
-        # Clear the last move on the board
-        self.board[last_move] = 0
+        def done():
+            self.fading.pop(last_move, None)
+        self.fading[last_move] = 0.0
+        self.tweens.append(Tween(FADE_TIME, fade, done))
 
-        # Animate the move
-        for i in range(10):
-            # Draw the move gradually
-            self.board[last_move] = i / 10.0
-            self.draw_board()
-            pygame.display.flip()
-            pygame.time.delay(10)  # delay for 20 milliseconds
-
-        # Restore the current state of the board
-        self.board = current_state
-
-    def draw_board(self):
-        # Create a surface with a vertical gradient
-        gradient = pygame.Surface((600, 600))
-        for i in range(600):
-            color = np.array([0, 0, 0]) + i * np.array([255, 255, 255]) / 800
-            pygame.draw.line(gradient, color, (0, i), (600, i))
-
-        # Blit the gradient onto the screen
-        self.screen.blit(gradient, (0, 0))
-        # Create a surface for the glowing effect
-        glow = pygame.Surface((600, 600), pygame.SRCALPHA)
-        # iphone pro max shade
-        glow.fill((160, 160, 152, 100))  # Changed color to blue
-        self.screen.blit(glow, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-
-        # Draw lines around the block to create a 3D shadow effect
-        for i in range(1, 5):
-            color = np.array([0, 0, 0]) + i * np.array([255, 255, 255]) / 5
-            pygame.draw.line(self.screen, color, (200 * i, 0), (200 * i, 600), 5)
-            pygame.draw.line(self.screen, color, (0, 200 * i), (600, 200 * i), 5)
-
-        # Create a surface for the lighting effect
-        lighting = pygame.Surface((600, 600), pygame.SRCALPHA)
-        lighting.fill((255, 255, 255, 100))  # Reduced intensity
-        self.screen.blit(lighting, (0, 0),
-                         special_flags=pygame.BLEND_RGBA_MULT)
-
-        # Draw the X's and O's with a 3D effect
-        # Draw the X's and O's with a 3D effect
-        for y in range(3):
-            for x in range(3):
-                center = (200 * x + 100, 200 * y + 100)
-                if self.board[y * 3 + x] == 1:  # Draw X
-                    for i in range(10):  # Increase range for thicker X
-                        pygame.draw.aaline(self.screen, (255 - i * 15, i * 5, 0), (center[0] - 60 + i, center[1] - 60 + i), (
-                            center[0] + 60 + i, center[1] + 60 + i), 3)  # Increase width for thicker line
-                        pygame.draw.aaline(self.screen, (255 - i * 15, i * 5, 0), (center[0] + 60 + i, center[1] - 60 + i), (
-                            center[0] - 60 + i, center[1] + 60 + i), 3)  # Increase width for thicker line
-
-                elif self.board[y * 3 + x] == -1:  # Draw O
-                    for i in range(10):  # Increase range for thicker O
-                        # Increase width for thicker circle
-                        pygame.gfxdraw.aacircle(
-                            self.screen, center[0], center[1], 50 + i, (11, 11, 255 - i * 15))
-
-    def handle_events(self):
-        for event in pygame.event.get():
+    def draw_board(self) -> list:
+        """
+        Draws the cells that changed and the fading marks.
+
+        Returns:
+            the rectangles of the screen that were redrawn
+        """
+        cells = list(self.board)
+        for index in self.fading:
+            cells[index] = 0
+        dirty = self.renderer.update(cells)
+        for index, alpha in self.fading.items():
+            dirty.append(self.renderer.draw_cell(cells, index, self.board[index], alpha))
+        return dirty
+
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
+                self.running = False
                 return False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.renderer.invalidate()
+            elif event.type == pygame.MOUSEBUTTONDOWN and self.scene == GAME_OVER:
+                self.click_play_again(event.pos)
             elif event.type == pygame.MOUSEBUTTONDOWN and self.player_turn:
-                x, y = pygame.mouse.get_pos()
+                x, y = event.pos
                 # Corrected action calculation for board indexing
-                column = x // 200
-                row = y // 200
-                if 0 <= column <= 2 and 0 <= row <= 2:  # Check if the click is within bounds
-                    action = row * 3 + column
+                column = x // self.cell
+                row = y // self.cell
+                if 0 <= column < self.game.cols and 0 <= row < self.game.rows:  # Check if the click is within bounds
+                    action = row * self.game.cols + column
                     if action in self.game.actions(self.board):
                         self.board = self.game.result(self.board, action)
                         self.player_turn = False
         return True
 
-    def display_message(self, message):
-        pygame.font.init()
-        myfont = pygame.font.Font('freesansbold.ttf', 32)  # Change the font and size
-        textsurface = myfont.render(message, True, (0, 255, 0))  # Change the color
+    def display_message(self, message, font=None, color=(0, 255, 0), y=None):
+        if font is None:
+            font = self.font
+        if y is None:
+            y = self.screen.get_height() // 2
+        textsurface = font.render(message, True, color)
         textRect = textsurface.get_rect()  # Get the rectangular area of the text
-        textRect.center = (self.screen.get_width() // 2, self.screen.get_height() // 2)  # Center the text
+        textRect.center = (self.screen.get_width() // 2, y)  # Center the text
         self.screen.blit(textsurface, textRect)
-    import math
-
-    def play_again(self):
-        # Initialize a variable for the animation
-        animation_time = 0
-
-        while True:
-            # Calculate the hover effect
-            hover_effect = math.sin(animation_time) * 10
 
-            # Clear the screen for the next frame
-            self.screen.fill((0, 0, 0))
+    def hover_effect(self) -> float:
+        return math.sin(self.animation_time) * 10
 
-            # Display the message
-            self.display_message("Play Again?")
+    def draw_play_again(self) -> list:
+        """
+        Draws the "Play Again?" screen with the hovering button
+        """
+        hover_effect = self.hover_effect()
+        self.screen.fill((0, 0, 0))
+        if self.error is not None:
+            self.display_message(self.error, self.error_font, (255, 80, 80), self.screen.get_height() // 3)
+        self.display_message("Play Again?")
+        pygame.draw.polygon(self.screen, (0, 255, 0), [(200, 550 + hover_effect), (300, 580 + hover_effect), (400, 550 + hover_effect)])
+        return [self.screen.get_rect()]
 
-            # Draw the shape with the hover effect
-            pygame.draw.polygon(self.screen, (0, 255, 0), [(200, 550 + hover_effect), (300, 580 + hover_effect), (400, 550 + hover_effect)])
+    def click_play_again(self, pos):
+        """
+        Starts a new game if the click hit the "Play Again?" button
+        """
+        x, y = pos
+        hover_effect = self.hover_effect()
+        if 200 <= x <= 400 and (550 + hover_effect) <= y <= (580 + hover_effect):
+            self.engine.cancel()
+            self.game.reset()
+            self.board = self.game.state
+            self.player_turn = True
+            self.error = None
+            self.scene = PLAYING
+            self.renderer.invalidate()
 
-            # Update the display
-            pygame.display.flip()
+    def update(self, dt: float):
+        """
+        Advances the animations and the game by dt seconds
+        """
+        self.tweens = [tween for tween in self.tweens if tween.step(dt)]
+        if self.scene == GAME_OVER:
+            self.animation_time += HOVER_SPEED * dt
+            return
+        try:
+            status = self.engine.poll()
+        except Exception as e:  # the search failed, the game ends instead of the window
+            self.engine.take_move()
+            self.error = f"The computer could not move: {e}"
+            self.scene = GAME_OVER
+            self.animation_time = 0.0
+            return
+        if status == DONE:
+            action = self.engine.take_move()
+            self.board = self.game.result(self.board, action)
+            self.animate_last_move(action)
+            self.player_turn = True
+        if self.game.is_terminal(self.board):
+            if not self.fading and not self.engine.running():
+                self.scene = GAME_OVER
+                self.animation_time = 0.0
+        elif not self.player_turn and not self.engine.running():
+            self.engine.start(self.board, time_limit=self.time_limit)
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    x, y = pygame.mouse.get_pos()
-                    if 200 <= x <= 400 and (550 + hover_effect) <= y <= (580 + hover_effect):  # Check if the click is within the "Play Again?" message
-                        self.game = TicTacToe()
-                        self.board = self.game.state
-                        self.player_turn = True
-                        return True
+    def render(self):
+        """
+        Draws the frame, only the parts of the screen that changed are updated
+        """
+        if self.scene == GAME_OVER:
+            dirty = self.draw_play_again()
+        else:
+            dirty = self.draw_board()
+        if dirty:
+            pygame.display.update(dirty)
 
-            # Update the animation time
-            animation_time += 0.1
+    def idle(self) -> bool:
+        """
+        Returns whether nothing happens until the player does something
+        """
+        return (self.scene == PLAYING and self.player_turn and not self.tweens
+                and not self.engine.running() and not self.game.is_terminal(self.board))
 
-            self.clock.tick(60)
     def run(self):
-        running = True
-        while running:
-            self.draw_board()
-            pygame.display.flip()
-            running = self.handle_events()
-            self.clock.tick(120)
-            if not self.player_turn and not self.game.is_terminal(self.board):
-                action = self.minimax.minimax_move(
-                    self.board.copy())  # Use the current board state
-                self.board = self.game.result(self.board, action)
-                self.animate_last_move(action)
-
-                self.player_turn = True
-            if self.game.is_terminal(self.board):
-                self.draw_board()
-                running = self.play_again()
+        self.running = True
+        previous = perf_counter()
+        lag = 0.0
+        while self.running:
+            if self.idle():
+                self.render()
+                # sleep until there is input, the time slept is not simulated
+                events = [pygame.event.wait()] + pygame.event.get()
+                previous = perf_counter()
+            else:
+                events = pygame.event.get()
+            self.handle_events(events)
+            now = perf_counter()
+            lag = min(lag + now - previous, MAX_LAG)
+            previous = now
+            while lag >= STEP:
+                self.update(STEP)
+                lag -= STEP
+            self.render()
+            self.clock.tick(FPS)
+        self.engine.cancel()
 
 
 if __name__ == "__main__":
-    gui = GameGUI()
+    tic_tac_toe = TicTacToe()
+    gui = GameGUI(tic_tac_toe, table=load_table("tic_tac_toe.table", tic_tac_toe))
+    # the objects of the imported modules live as long as the game, keeping them out
+    # of the collections during a search avoids frames dropped by a full collection
+    gc.freeze()
 
     gui.run()
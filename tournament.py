@@ -0,0 +1,368 @@
+"""
+Headless self-play for comparing engine configurations.
+Two engines play games against each other on a process pool, without a GUI.
+Every game starts with a few random moves so deterministic engines do not
+play the same game over and over, and each opening is played twice with the
+colors swapped. The result of every game is written as a JSON line as soon
+as it is known, and a sequential probability ratio test (SPRT) stops the
+tournament as soon as the results show which of two Elo hypotheses holds.
+
+Usage:
+    python tournament.py --games 1000 --output games.jsonl \\
+        --engine-a '{"iterations": 9}' --engine-b '{"iterations": 2}'
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from time import perf_counter
+from typing import List
+from game_tic_tac_toe import TicTacToe
+from minimax import Minimax
+from tree_recorder import NullRecorder
+
+MAX = 1
+MIN = -1
+# random openings tried before the number of opening plies is taken as too large
+OPENING_TRIES = 1000
+
+# SPRT decisions
+H0 = "H0"  # engine A is not stronger than elo0
+H1 = "H1"  # engine A is stronger than elo1
+
+
+class EngineConfig:
+    """
+    EngineConfig class, everything needed to create an engine in a worker process
+    """
+
+    def __init__(self, name: str = "minimax", iterations: int = 10, time_limit: float = None,
+                 node_limit: int = None, **options):
+        """
+        Initializes the EngineConfig class
+
+        Args:
+            name (str): name used in the results
+            iterations (int): maximum number of plies to search per move
+            time_limit (float): seconds per move, turns on iterative deepening
+            node_limit (int): nodes per move, turns on iterative deepening
+            options: keyword arguments of Minimax, e.g. tt_size, symmetry, ordering
+        """
+        self.name = name
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.options = options
+
+    def make_engine(self, game_logic) -> Minimax:
+        """
+        Returns a new engine without tree recording
+        """
+        return Minimax(game_logic, recorder=NullRecorder(), **self.options)
+
+    def move(self, engine: Minimax, state: List[int]) -> int:
+        """
+        Asks the engine for a move with the search limits of the configuration
+        """
+        return engine.minimax_move(state, iterations=self.iterations,
+                                   time_limit=self.time_limit, node_limit=self.node_limit)
+
+
+def random_opening(game_logic, plies: int, seed: int) -> List[int]:
+    """
+    Returns 'plies' random moves from the initial state that do not end the game.
+    Raises ValueError if no such opening was found in OPENING_TRIES tries.
+    """
+    rng = random.Random(seed)
+    game_logic.reset()
+    for _ in range(OPENING_TRIES):
+        state = game_logic.state
+        moves = []
+        for _ in range(plies):
+            if game_logic.is_terminal(state):
+                break
+            action = rng.choice(game_logic.actions(state))
+            moves.append(action)
+            state = game_logic.result(state, action)
+        if not game_logic.is_terminal(state):
+            return moves
+    raise ValueError(f"No opening of {plies} plies that does not end the game")
+
+
+def play_game(game_logic, engine_x: EngineConfig, engine_o: EngineConfig, opening: List[int]) -> dict:
+    """
+    Plays one game between two fresh engines from the given opening moves.
+
+    Returns:
+        dict with the moves, the result (1 if X won, -1 if O won, 0 for a draw)
+        and the time and nodes each engine used
+    """
+    game_logic.reset()
+    state = game_logic.state
+    for action in opening:
+        state = game_logic.result(state, action)
+    configs = {MAX: engine_x, MIN: engine_o}
+    engines = {MAX: engine_x.make_engine(game_logic), MIN: engine_o.make_engine(game_logic)}
+    times = {MAX: 0.0, MIN: 0.0}
+    moves = {MAX: 0, MIN: 0}
+    history = list(opening)
+    while not game_logic.is_terminal(state):
+        player = game_logic.to_move(state)
+        start = perf_counter()
+        action = configs[player].move(engines[player], state)
+        times[player] += perf_counter() - start
+        moves[player] += 1
+        history.append(action)
+        state = game_logic.result(state, action)
+    return {
+        "x": engine_x.name,
+        "o": engine_o.name,
+        "moves": history,
+        "opening_plies": len(opening),
+        "result": game_logic.utility(state),
+        "x_time": times[MAX],
+        "o_time": times[MIN],
+        "x_moves": moves[MAX],
+        "o_moves": moves[MIN],
+        "x_nodes": engines[MAX].nodes,
+        "o_nodes": engines[MIN].nodes,
+    }
+
+
+def _play_pair_game(game_logic, engine_a: EngineConfig, engine_b: EngineConfig, index: int,
+                    opening_plies: int, seed: int) -> dict:
+    """
+    Plays game 'index' of a tournament in a worker process. Games 2k and 2k + 1
+    share the opening, engine A plays X in the even games and O in the odd ones.
+    """
+    opening = random_opening(game_logic, opening_plies, seed + index // 2)
+    if index % 2 == 0:
+        record = play_game(game_logic, engine_a, engine_b, opening)
+        record["a_side"] = "x"
+        record["a_score"] = record["result"]
+    else:
+        record = play_game(game_logic, engine_b, engine_a, opening)
+        record["a_side"] = "o"
+        record["a_score"] = -record["result"]
+    record["game"] = index
+    return record
+
+
+def elo_to_score(elo: float) -> float:
+    """
+    Returns the expected score of a player 'elo' points stronger than the opponent
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score: float) -> float:
+    """
+    Returns the Elo difference that gives the expected score
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+class Tournament:
+    """
+    Tournament class
+
+    Counts the wins, draws and losses of engine A against engine B, and runs an
+    SPRT of H0: elo <= elo0 against H1: elo >= elo1 with error rates alpha and
+    beta, using the normal approximation of the log likelihood ratio of the
+    game scores (win 1, draw 0.5, loss 0).
+    """
+
+    def __init__(self, engine_a: EngineConfig, engine_b: EngineConfig, game_logic=None, games: int = 1000,
+                 workers: int = None, opening_plies: int = 2, seed: int = 0, output: str = None,
+                 elo0: float = 0, elo1: float = 20, alpha: float = 0.05, beta: float = 0.05):
+        """
+        Initializes the Tournament class
+
+        Args:
+            engine_a (EngineConfig): the engine under test
+            engine_b (EngineConfig): the reference engine
+            game_logic (GameLogic): the game to play, TicTacToe by default
+            games (int): maximum number of games
+            workers (int): number of worker processes, the number of CPUs by default
+            opening_plies (int): random moves at the start of every opening
+            seed (int): seed of the random openings
+            output (str): JSONL file the game records are appended to
+            elo0, elo1 (float): Elo differences of the hypotheses H0 and H1
+            alpha, beta (float): error rates of the SPRT
+        """
+        self.engine_a = engine_a
+        self.engine_b = engine_b
+        self.game = game_logic if game_logic is not None else TicTacToe()
+        self.games = games
+        self.workers = workers
+        self.opening_plies = opening_plies
+        # fails here instead of in every worker if the openings end the game
+        random_opening(self.game, opening_plies, seed)
+        self.seed = seed
+        self.output = output
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        # statistics of engine A and engine B, the names of the engines may be the same
+        self.time = {"a": 0.0, "b": 0.0}
+        self.moves = {"a": 0, "b": 0}
+        self.nodes = {"a": 0, "b": 0}
+        self.decision = None
+
+    @property
+    def played(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def add(self, record: dict):
+        """
+        Adds the result of a game
+        """
+        if record["a_score"] > 0:
+            self.wins += 1
+        elif record["a_score"] < 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        a_side = record["a_side"]
+        for engine, side in (("a", a_side), ("b", "o" if a_side == "x" else "x")):
+            self.time[engine] += record[f"{side}_time"]
+            self.moves[engine] += record[f"{side}_moves"]
+            self.nodes[engine] += record[f"{side}_nodes"]
+
+    def score(self) -> float:
+        """
+        Returns the average score of engine A
+        """
+        if self.played == 0:
+            return 0.5
+        return (self.wins + 0.5 * self.draws) / self.played
+
+    def llr(self) -> float:
+        """
+        Returns the log likelihood ratio of H1 against H0, 0 while the scores do not vary
+        """
+        n = self.played
+        if n == 0:
+            return 0.0
+        score = self.score()
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2
+                    + self.losses * score ** 2) / n
+        if variance <= 0:
+            return 0.0
+        s0 = elo_to_score(self.elo0)
+        s1 = elo_to_score(self.elo1)
+        return n * (s1 - s0) * (2 * score - s0 - s1) / (2 * variance)
+
+    def check_sprt(self) -> str:
+        """
+        Returns H0 or H1 once the test accepts one of them, None while it continues
+        """
+        llr = self.llr()
+        if llr <= self.lower_bound:
+            self.decision = H0
+        elif llr >= self.upper_bound:
+            self.decision = H1
+        return self.decision
+
+    def run(self) -> dict:
+        """
+        Plays the games until all are played or the SPRT decides, and returns the summary
+        """
+        out = open(self.output, "a") if self.output else None
+        start = perf_counter()
+        workers = self.workers or os.cpu_count()
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            next_game = 0
+            pending = set()
+            # one game per worker, a game that is running when the SPRT decides
+            # is played to the end but not counted
+            while self.decision is None and (next_game < self.games or pending):
+                while next_game < self.games and len(pending) < workers:
+                    pending.add(pool.submit(_play_pair_game, self.game, self.engine_a, self.engine_b,
+                                            next_game, self.opening_plies, self.seed))
+                    next_game += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    self.add(record)
+                    if out is not None:
+                        out.write(json.dumps(record) + "\n")
+                    if self.check_sprt() is not None:
+                        break
+                if out is not None:
+                    out.flush()
+        finally:
+            pool.shutdown(cancel_futures=True)
+            if out is not None:
+                out.close()
+        summary = self.summary()
+        summary["time"] = perf_counter() - start
+        return summary
+
+    def summary(self) -> dict:
+        """
+        Returns the statistics of the games played so far
+        """
+        engines = {}
+        for engine, config in (("a", self.engine_a), ("b", self.engine_b)):
+            moves = self.moves[engine]
+            engines[engine] = {
+                "name": config.name,
+                "time_per_move": self.time[engine] / moves if moves else 0.0,
+                "nodes_per_move": self.nodes[engine] / moves if moves else 0.0,
+                "nodes_per_sec": self.nodes[engine] / self.time[engine] if self.time[engine] > 0 else 0.0,
+            }
+        return {
+            "a": self.engine_a.name,
+            "b": self.engine_b.name,
+            "games": self.played,
+            "wins": self.wins,
+            "draws": self.draws,
+            "losses": self.losses,
+            "score": self.score(),
+            "elo": score_to_elo(self.score()),
+            "llr": self.llr(),
+            "bounds": [self.lower_bound, self.upper_bound],
+            "decision": self.decision,
+            "engines": engines,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play engine configurations against each other")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--opening-plies", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSONL file for the game records")
+    parser.add_argument("--engine-a", default="{}", help="JSON options of engine A, e.g. '{\"iterations\": 9}'")
+    parser.add_argument("--engine-b", default='{"iterations": 2}', help="JSON options of engine B")
+    parser.add_argument("--elo0", type=float, default=0)
+    parser.add_argument("--elo1", type=float, default=20)
+    args = parser.parse_args()
+
+    engine_a = EngineConfig(**{"name": "A", **json.loads(args.engine_a)})
+    engine_b = EngineConfig(**{"name": "B", **json.loads(args.engine_b)})
+    try:
+        tournament = Tournament(engine_a, engine_b, games=args.games, workers=args.workers,
+                                opening_plies=args.opening_plies, seed=args.seed, output=args.output,
+                                elo0=args.elo0, elo1=args.elo1)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(tournament.run(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+TranspositionTable class for caching search results of the minimax algorithm.
+The same position is often reached through different move orders, so storing
+the value of a searched position saves searching it again.
+"""
+
+from collections import OrderedDict
+from math import inf
+
+EXACT = 0  # the stored value is the exact minimax value
+LOWER = 1  # the search failed high, the real value is >= the stored value
+UPPER = 2  # the search failed low, the real value is <= the stored value
+
+LRU = "lru"
+FIFO = "fifo"
+
+
+class TTEntry:
+    """
+    A single entry in the transposition table. 'depth' is the number of plies
+    the value was searched to, inf when the value does not depend on a horizon.
+    """
+    __slots__ = ("value", "flag", "best_move", "depth")
+
+    def __init__(self, value, flag: int, best_move, depth=inf):
+        self.value = value
+        self.flag = flag
+        self.best_move = best_move
+        self.depth = depth
+
+
+class TranspositionTable:
+    """
+    TranspositionTable class
+
+    Stores the value, the bound type and the best move of searched positions.
+    When the table holds more than max_size entries, the oldest entry is
+    evicted. With the LRU policy a lookup refreshes the entry, with the FIFO
+    policy entries are evicted in insertion order.
+    """
+
+    def __init__(self, max_size: int = 100000, policy: str = LRU):
+        """
+        Initializes the TranspositionTable class
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if policy not in (LRU, FIFO):
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_size = max_size
+        self.policy = policy
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        """
+        Returns the entry stored for the key, or None if there is none
+        """
+        entry = self.table.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == LRU:
+            self.table.move_to_end(key)
+        return entry
+
+    def peek(self, key):
+        """
+        Returns the entry stored for the key without counting the lookup or
+        refreshing the entry, for reading the table outside the search
+        """
+        return self.table.get(key)
+
+    def store(self, key, value, flag: int, best_move=None, depth=inf):
+        """
+        Stores the result of a search, evicting an old entry if the table is full
+        """
+        if key in self.table:
+            self.table[key] = TTEntry(value, flag, best_move, depth)
+            self.table.move_to_end(key)
+            return
+        if len(self.table) >= self.max_size:
+            self.table.popitem(last=False)
+            self.evictions += 1
+        self.table[key] = TTEntry(value, flag, best_move, depth)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters
+        """
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hit_rate(self) -> float:
+        """
+        Returns the ratio of lookups that found an entry
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
+
+    def __len__(self):
+        return len(self.table)
+
+    def __str__(self):
+        """
+        return pretty print of the table statistics
+        """
+        return (f"TranspositionTable(size={len(self.table)}/{self.max_size}, "
+                f"hits={self.hits}, misses={self.misses}, "
+                f"evictions={self.evictions}, hit_rate={self.hit_rate():.2%})")
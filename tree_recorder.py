@@ -0,0 +1,248 @@
+"""
+Tree recorders collect the game tree while the minimax search runs.
+The search reports every child it visits, the values it computes and the moves
+it prunes, and the recorder decides what to keep:
+
+- NullRecorder keeps nothing and costs nothing, use it when the tree is never shown
+- FullRecorder keeps every reported node in a GameTree
+- DepthCappedRecorder keeps the nodes up to a given depth
+- SamplingRecorder keeps a random sample of the subtrees
+- CompactRecorder keeps the whole search tree in a CompactGameTree
+"""
+
+import random
+from typing import List
+from game_tree import GameTree
+from compact_tree import CompactGameTree, NO_PARENT
+
+MAX = 1
+MIN = -1
+
+
+class TreeRecorder:
+    """
+    TreeRecorder class, the interface of the recorders. All methods do nothing.
+    """
+    enabled = False
+
+    def __init__(self):
+        self.game = None
+        self.tree = None
+
+    def attach(self, game_logic):
+        """
+        Sets the game whose states are reported
+        """
+        self.game = game_logic
+        if self.tree is not None and hasattr(self.tree, "cols"):
+            self.tree.cols = game_logic.cols
+
+    def reset(self, initial_state=None):
+        """
+        Starts a new tree from the initial state
+        """
+
+    def begin(self, state: List[int], depth: int = 0):
+        """
+        Called when a search starts from 'state' at 'depth'
+        """
+
+    def add_child(self, parent: List[int], child: List[int], depth: int):
+        """
+        Records the edge from a node at 'depth' to its child at 'depth + 1'
+        """
+
+    def add_pruned(self, parent: List[int], actions: List[int], depth: int):
+        """
+        Records the children of a node that were cut off by alpha-beta pruning
+        """
+
+    def set_value(self, state: List[int], depth: int, value):
+        """
+        Records the value computed for a node
+        """
+
+    def set_best_move(self, state: List[int], depth: int, move: int):
+        """
+        Records the best move found for a node
+        """
+
+
+class NullRecorder(TreeRecorder):
+    """
+    NullRecorder class, does not record anything
+    """
+
+
+class FullRecorder(TreeRecorder):
+    """
+    FullRecorder class, records every reported node in a GameTree
+    """
+    enabled = True
+    max_depth = None
+
+    def __init__(self, canonical: bool = False):
+        """
+        Initializes the FullRecorder class
+
+        Args:
+            canonical (bool): merge the nodes of states that are symmetric to each other
+        """
+        super().__init__()
+        self.canonical = canonical
+        self.tree = GameTree(canonical=canonical)
+
+    def attach(self, game_logic):
+        """
+        Sets the game whose states are reported and starts a tree with its board
+        """
+        super().attach(game_logic)
+        self.reset()
+
+    def reset(self, initial_state=None):
+        """
+        Starts a new tree from the initial state
+        """
+        if initial_state is not None:
+            initial_state = self.cells(initial_state)
+        cols = 3 if self.game is None else self.game.cols
+        self.tree.close()
+        game_logic = None if self.game is None else self.game.cells_logic()
+        self.tree = GameTree(initial_state, canonical=self.canonical, cols=cols, game_logic=game_logic)
+
+    def cells(self, state):
+        """
+        Returns the state as the list of cells the game tree stores
+        """
+        if self.game is None:
+            return state
+        return self.game.cells(state)
+
+    def keep(self, parent: List[int], depth: int) -> bool:
+        """
+        Returns whether the children of a node at 'depth' should be recorded
+        """
+        return self.max_depth is None or depth < self.max_depth
+
+    @staticmethod
+    def packed(state: List[int], depth: int) -> List:
+        """
+        Returns the [level, state, player] list the game tree expects
+        """
+        player = MAX if depth % 2 == 0 else MIN
+        return [depth, state, player]
+
+    def add_child(self, parent: List[int], child: List[int], depth: int):
+        if not self.keep(parent, depth):
+            return
+        child_node = self.packed(self.cells(child), depth + 1)
+        self.tree.add_node(child_node)
+        self.tree.add_edge(self.packed(self.cells(parent), depth), child_node)
+
+    def add_pruned(self, parent: List[int], actions: List[int], depth: int):
+        if self.max_depth is not None and depth >= self.max_depth:
+            return
+        for a in actions:
+            child = self.game.result(parent, a)
+            self.add_child(parent, child, depth)
+            if self.game.is_terminal(child):
+                self.set_value(child, depth + 1, self.game.utility(child))
+
+    def set_value(self, state: List[int], depth: int, value):
+        self.tree.update_node_value(self.packed(self.cells(state), depth), value)
+
+    def set_best_move(self, state: List[int], depth: int, move: int):
+        self.tree.update_node_best_move(self.packed(self.cells(state), depth), move)
+
+
+class DepthCappedRecorder(FullRecorder):
+    """
+    DepthCappedRecorder class, records the nodes up to 'max_depth' plies below the root
+    """
+
+    def __init__(self, max_depth: int, canonical: bool = False):
+        super().__init__(canonical)
+        self.max_depth = max_depth
+
+
+class SamplingRecorder(FullRecorder):
+    """
+    SamplingRecorder class, records each child with probability 'rate'.
+    A child is only recorded if its parent was, so the sample stays a connected tree.
+    """
+
+    def __init__(self, rate: float, max_depth: int = None, canonical: bool = False, seed: int = None):
+        super().__init__(canonical)
+        self.rate = rate
+        self.max_depth = max_depth
+        self.random = random.Random(seed)
+
+    def keep(self, parent: List[int], depth: int) -> bool:
+        if not super().keep(parent, depth):
+            return False
+        if depth > 0 and self.tree.generate_id(self.cells(parent)) not in self.tree.G:
+            return False
+        return self.random.random() < self.rate
+
+
+class CompactRecorder(TreeRecorder):
+    """
+    CompactRecorder class, records the search tree in a CompactGameTree.
+    Nodes are not merged, every search adds a new root and every visited child
+    gets its own node, so the tree holds exactly what the search did.
+    """
+    enabled = True
+
+    def __init__(self):
+        super().__init__()
+        self.path = []  # nodes from the root of the search to the current node
+        self.root_depth = 0  # depth the search started at, the root is path[0]
+
+    def cells(self, state):
+        """
+        Returns the state as the list of cells the tree stores
+        """
+        if self.game is None:
+            return state
+        return self.game.cells(state)
+
+    def reset(self, initial_state=None):
+        self.tree = None
+        self.path = []
+        if initial_state is not None:
+            self.begin(initial_state)
+
+    def begin(self, state: List[int], depth: int = 0):
+        cells = self.cells(state)
+        if self.tree is None:
+            cols = 3 if self.game is None else self.game.cols
+            self.tree = CompactGameTree(len(cells), cols)
+        self.root_depth = depth
+        player = MAX if depth % 2 == 0 else MIN
+        self.path = [self.tree.add_node(cells, 0, player, NO_PARENT)]
+
+    def add_child(self, parent: List[int], child: List[int], depth: int):
+        if not self.path:
+            self.begin(parent, depth)
+        level = depth - self.root_depth
+        player = MAX if (depth + 1) % 2 == 0 else MIN
+        node = self.tree.add_node(self.cells(child), level + 1, player, self.path[level])
+        del self.path[level + 1:]
+        self.path.append(node)
+
+    def add_pruned(self, parent: List[int], actions: List[int], depth: int):
+        for a in actions:
+            child = self.game.result(parent, a)
+            self.add_child(parent, child, depth)
+            if self.game.is_terminal(child):
+                self.set_value(child, depth + 1, self.game.utility(child))
+
+    def set_value(self, state: List[int], depth: int, value):
+        level = depth - self.root_depth
+        if 0 <= level < len(self.path):
+            self.tree.update_node_value(self.path[level], value)
+
+    def set_best_move(self, state: List[int], depth: int, move: int):
+        level = depth - self.root_depth
+        if 0 <= level < len(self.path):
+            self.tree.update_node_best_move(self.path[level], move)
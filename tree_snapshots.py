@@ -0,0 +1,308 @@
+"""
+Animation of a game tree while the search builds it.
+The search only appends small tuples (the tree deltas) to a list and sends
+them to a queue every few nodes. A separate process draws the frames and
+writes them to an animated GIF as they arrive, so neither the layout nor the
+drawing slows the search down.
+
+The layout is computed once per node and never changes: the root gets the
+whole width, and every child gets the next of 'branching' equal slices of
+its parent's width, one level further down. A frame only draws the nodes and
+edges that are new or whose value changed, and the GIF stores only the
+rectangle of the image that changed.
+
+- TreeSnapshots is used by the search process to send the deltas
+- SnapshotRenderer draws the tree in the render process
+- GifStream writes the frames of a GIF one at a time
+"""
+
+import atexit
+import multiprocessing
+from typing import List
+from PIL import Image, ImageDraw, GifImagePlugin
+
+# kinds of tree deltas
+NODE = 0  # (NODE, node, level)
+EDGE = 1  # (EDGE, parent, child)
+VALUE = 2  # (VALUE, node, value)
+
+# palette of the frames, drawn in "P" mode so no frame has to be quantized
+WHITE, EDGE_COLOR, MAX_COLOR, MIN_COLOR, WIN_COLOR, LOSS_COLOR, DRAW_COLOR, PRUNED_COLOR = range(8)
+PALETTE = [
+    255, 255, 255,  # background
+    169, 169, 169,  # edges
+    173, 216, 230,  # nodes where max is to move
+    250, 128, 114,  # nodes where min is to move
+    30, 144, 255,  # value 1
+    220, 20, 60,  # value -1
+    90, 90, 90,  # value 0
+    128, 0, 128,  # pruned, value inf or -inf
+]
+NODE_RADIUS = 3
+MARGIN = 10
+
+
+class GifStream:
+    """
+    GifStream class, writes an animated GIF frame by frame.
+    Every frame after the first only stores the rectangle that changed and is
+    drawn on top of the previous one.
+    """
+
+    def __init__(self, path: str, fps: float = 10):
+        self.path = path
+        self.file = None  # opened with the first frame, so a GIF without frames makes no file
+        self.duration = int(1000 / fps)
+        self.started = False
+
+    def write(self, image: Image.Image, box=None):
+        """
+        Appends a frame, 'box' is the rectangle (left, top, right, bottom) of the
+        image that changed since the last frame, the whole image if None
+        """
+        if not self.started:
+            self.file = open(self.path, "wb")
+            header, _ = GifImagePlugin.getheader(image, info={"loop": 0, "duration": self.duration})
+            self.file.write(b"".join(header))
+            box = None
+            self.started = True
+        if box is None:
+            box = (0, 0) + image.size
+        frame = image.crop(box)
+        for data in GifImagePlugin.getdata(frame, offset=box[:2], duration=self.duration):
+            self.file.write(data)
+
+    def close(self):
+        if self.started:
+            self.file.write(b";")
+            self.file.close()
+
+
+class SnapshotRenderer:
+    """
+    SnapshotRenderer class
+
+    Keeps the position of every node, so a frame only draws what the deltas
+    changed. The image is only redrawn completely when a node is deeper than
+    the levels the height was divided into.
+    """
+
+    def __init__(self, size=(800, 600), levels: int = 10, branching: int = 9):
+        """
+        Initializes the SnapshotRenderer class
+
+        Args:
+            size ((int, int)): width and height of the frames in pixels
+            levels (int): number of levels the height is divided into at first
+            branching (int): number of slices the width of a node is divided into for its children
+        """
+        self.size = size
+        self.levels = levels
+        self.branching = branching
+        self.image = Image.new("P", size, WHITE)
+        self.image.putpalette(PALETTE)
+        self.draw = ImageDraw.Draw(self.image)
+        self.level = {}  # level of every node
+        self.span = {}  # (left, width) of the slice of every node placed in the layout, 0 to 1
+        self.children = {}  # number of children placed under every node
+        self.color = {}  # fill color of every node
+        self.edges = []
+        self.dirty = None  # rectangle changed since the last frame
+
+    def position(self, node: int) -> (int, int):
+        """
+        Returns the pixel position of a node
+        """
+        width, height = self.size
+        left, span = self.span[node]
+        x = MARGIN + (left + span / 2) * (width - 2 * MARGIN)
+        y = MARGIN + self.level[node] * (height - 2 * MARGIN) / max(1, self.levels - 1)
+        return x, y
+
+    def mark_dirty(self, box):
+        if self.dirty is None:
+            self.dirty = list(box)
+        else:
+            self.dirty = [min(self.dirty[0], box[0]), min(self.dirty[1], box[1]),
+                          max(self.dirty[2], box[2]), max(self.dirty[3], box[3])]
+
+    def place(self, node: int, parent: int = None):
+        """
+        Gives a node its slice of the width, the whole width for a root
+        """
+        if parent is None:
+            self.span[node] = (0.0, 1.0)
+        else:
+            left, span = self.span[parent]
+            index = self.children.get(parent, 0)
+            self.children[parent] = index + 1
+            slice_width = span / self.branching
+            self.span[node] = (left + min(index, self.branching - 1) * slice_width, slice_width)
+        if self.level[node] >= self.levels:
+            self.levels = self.level[node] + 1
+            self.redraw()
+
+    def draw_node(self, node: int):
+        x, y = self.position(node)
+        box = (int(x) - NODE_RADIUS, int(y) - NODE_RADIUS, int(x) + NODE_RADIUS + 1, int(y) + NODE_RADIUS + 1)
+        self.draw.ellipse(box, fill=self.color[node])
+        self.mark_dirty(box)
+
+    def draw_edge(self, parent: int, child: int):
+        (x1, y1), (x2, y2) = self.position(parent), self.position(child)
+        self.draw.line((x1, y1, x2, y2), fill=EDGE_COLOR)
+        self.mark_dirty((int(min(x1, x2)), int(min(y1, y2)), int(max(x1, x2)) + 1, int(max(y1, y2)) + 1))
+
+    def redraw(self):
+        """
+        Draws every placed node and edge again, e.g. after the levels changed
+        """
+        self.draw.rectangle((0, 0) + self.size, fill=WHITE)
+        for parent, child in self.edges:
+            self.draw_edge(parent, child)
+        for node in self.span:
+            self.draw_node(node)
+        self.dirty = [0, 0, self.size[0], self.size[1]]
+
+    def apply(self, deltas: List[tuple]):
+        """
+        Applies a batch of deltas and draws what they changed
+        """
+        for kind, a, b in deltas:
+            if kind == NODE:
+                self.level.setdefault(a, b)
+                self.color.setdefault(a, MAX_COLOR if b % 2 == 0 else MIN_COLOR)
+            elif kind == EDGE:
+                if a not in self.level:
+                    self.level[a] = 0
+                    self.color[a] = MAX_COLOR
+                if a not in self.span:
+                    self.place(a)
+                    self.draw_node(a)
+                if b not in self.level:
+                    self.level[b] = self.level[a] + 1
+                    self.color[b] = MAX_COLOR if self.level[b] % 2 == 0 else MIN_COLOR
+                if b not in self.span:
+                    self.place(b, a)
+                self.edges.append((a, b))
+                self.draw_edge(a, b)
+                self.draw_node(a)
+                self.draw_node(b)
+            elif kind == VALUE:
+                if b in (float('inf'), float('-inf')):
+                    color = PRUNED_COLOR
+                elif b > 0:
+                    color = WIN_COLOR
+                elif b < 0:
+                    color = LOSS_COLOR
+                else:
+                    color = DRAW_COLOR
+                self.color[a] = color
+                if a in self.span:
+                    self.draw_node(a)
+
+    def take_dirty(self):
+        """
+        Returns the rectangle changed since the last call, None if nothing changed
+        """
+        dirty, self.dirty = self.dirty, None
+        if dirty is None:
+            return None
+        width, height = self.size
+        return (max(0, dirty[0]), max(0, dirty[1]), min(width, dirty[2]), min(height, dirty[3]))
+
+
+def render_snapshots(queue, path: str, fps: float, size, levels: int, branching: int):
+    """
+    Runs in the render process, draws a frame for every batch of deltas
+    until it gets None
+    """
+    renderer = SnapshotRenderer(size, levels, branching)
+    stream = GifStream(path, fps)
+    try:
+        while True:
+            deltas = queue.get()
+            if deltas is None:
+                break
+            renderer.apply(deltas)
+            box = renderer.take_dirty()
+            if box is not None:
+                stream.write(renderer.image, box)
+    finally:
+        stream.close()
+
+
+class TreeSnapshots:
+    """
+    TreeSnapshots class
+
+    The search side of the pipeline. Node ids of the game tree are replaced by
+    small integers, and the deltas of 'every' new nodes are sent to the render
+    process together, as one frame.
+    """
+
+    def __init__(self, path: str, every: int = 10, fps: float = 10, size=(800, 600),
+                 levels: int = 10, branching: int = 9):
+        """
+        Initializes the TreeSnapshots class and starts the render process
+
+        Args:
+            path (str): the GIF file to write
+            every (int): number of new nodes per frame
+            fps (float): frames per second of the animation
+            size ((int, int)): width and height of the frames in pixels
+            levels (int): number of levels the height is divided into at first
+            branching (int): number of slices the width of a node is divided into for its children
+        """
+        self.path = path
+        self.every = every
+        self.ids = {}
+        self.deltas = []
+        self.new_nodes = 0
+        # spawn, the search may run next to GUI threads that must not be forked
+        context = multiprocessing.get_context("spawn")
+        self.queue = context.Queue()
+        self.process = context.Process(target=render_snapshots,
+                                       args=(self.queue, path, fps, size, levels, branching))
+        self.process.start()
+        atexit.register(self.close)
+
+    def node_index(self, node_id) -> int:
+        index = self.ids.get(node_id)
+        if index is None:
+            index = self.ids[node_id] = len(self.ids)
+        return index
+
+    def add_node(self, node_id, level: int):
+        self.deltas.append((NODE, self.node_index(node_id), level))
+        self.new_nodes += 1
+        if self.new_nodes >= self.every:
+            self.flush()
+
+    def add_edge(self, parent_id, child_id):
+        self.deltas.append((EDGE, self.node_index(parent_id), self.node_index(child_id)))
+
+    def set_value(self, node_id, value):
+        if node_id in self.ids:
+            self.deltas.append((VALUE, self.ids[node_id], value))
+
+    def flush(self):
+        """
+        Sends the deltas collected so far to the render process as one frame
+        """
+        if self.deltas and self.process is not None:
+            self.queue.put(self.deltas)
+        self.deltas = []
+        self.new_nodes = 0
+
+    def close(self):
+        """
+        Sends the last frame and waits until the render process wrote the file
+        """
+        if self.process is None:
+            return
+        self.flush()
+        self.queue.put(None)
+        self.process.join()
+        self.process = None
+        atexit.unregister(self.close)